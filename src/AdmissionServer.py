@@ -0,0 +1,373 @@
+#!/usr/bin/python2.7
+
+import os
+import signal
+import socket
+import asyncore
+import asynchat
+import argparse
+import itertools
+from collections import OrderedDict
+
+from SafetyEngine import SafetyEngine
+
+
+class Decision:
+    '''
+    Mimic enums for the replies to a client's instructions
+    '''
+    OK = "ok"
+    GRANT = "grant"
+    WAIT = "wait"
+    ABORT = "abort"
+    ERROR = "error"
+
+
+class AdmissionController:
+    '''
+    Online counterpart of the Banker's manager of a Simulation: tasks claim
+    units, then request and release them one instruction at a time and are
+    told right away whether a request is granted, has to wait or gets them
+    aborted (for exceeding their claims). Waiting requests are granted, in
+    the order they were made, once freed units make them safe (see
+    wakeWaiting()). Unlike in a simulation there are no cycles, so released
+    units are available at once. Note that task IDs are slots (1 to
+    maxTasks) that can be reused once a task is done or aborted.
+    '''
+
+    def __init__(self, units, maxTasks):
+        self.units = tuple(units) # Total units of each resource
+        self.maxTasks = maxTasks
+
+        self.safety = SafetyEngine(maxTasks, len(units))
+        for rID, numUnits in enumerate(units, 1):
+            self.safety.setAvailable(rID, numUnits)
+        for taskID in range(1, maxTasks + 1): # Until they claim units
+            self.safety.retireTask(taskID)
+
+        # Maps IDs of registered tasks to their claims and held units (lists
+        # in order of resource ID)
+        self.claims = {}
+        self.held = {}
+        # Maps IDs of waiting tasks to (resource ID, units, waiter), in the
+        # order they were told to wait (waiter is whatever the caller wants
+        # back when the request is granted)
+        self.waiting = OrderedDict()
+        # Maps resource IDs to the same (ID -> number they were given when
+        # told to wait) for the tasks waiting for units of that resource
+        self.waitQueues = {rID:OrderedDict()
+            for rID in range(1, len(units) + 1)}
+        self.waitNumbers = itertools.count()
+
+        # What happened since the waiting requests were last retried: IDs
+        # of resources whose units were released, whether tasks were
+        # retired, and IDs of resources whose units were released since all
+        # of them were last retried (see wakeWaiting())
+        self.freedResources = set()
+        self.tasksRetired = False
+        self.freedSinceFullWake = set()
+
+
+    def claim(self, taskID, resourceID, numUnits):
+        '''
+        Records a task's claim for a resource, registering the task if it
+        isn't yet. Aborts it if the claim exceeds the units present.
+        '''
+        if taskID not in self.claims:
+            self.claims[taskID] = [0] * len(self.units)
+            self.held[taskID] = [0] * len(self.units)
+            self.safety.admitTask(taskID)
+
+        if numUnits > self.units[resourceID - 1]:
+            self.abort(taskID)
+            return Decision.ABORT
+
+        self.claims[taskID][resourceID - 1] = numUnits
+        self.safety.setClaims(taskID, resourceID, numUnits)
+        return Decision.OK
+
+    def request(self, taskID, resourceID, numUnits, waiter=None):
+        '''
+        Grants the units if that leaves the system in a safe state, or else
+        tells the task to wait (until wakeWaiting() grants them). Aborts the
+        task if the request exceeds its claim.
+        '''
+        col = resourceID - 1
+        if numUnits > self.claims[taskID][col] - self.held[taskID][col]:
+            self.abort(taskID)
+            return Decision.ABORT
+
+        if self.isSafe(taskID, resourceID, numUnits):
+            self.grant(taskID, resourceID, numUnits)
+            return Decision.GRANT
+
+        self.waiting[taskID] = (resourceID, numUnits, waiter)
+        self.waitQueues[resourceID][taskID] = next(self.waitNumbers)
+        return Decision.WAIT
+
+    def release(self, taskID, resourceID, numUnits):
+        '''
+        Gives back units the task holds (no more than it holds)
+        '''
+        col = resourceID - 1
+        numUnits = min(numUnits, self.held[taskID][col])
+
+        self.held[taskID][col] -= numUnits
+        self.safety.releaseResource(taskID, resourceID, numUnits)
+        self.safety.freeUnits(resourceID, numUnits)
+        if numUnits:
+            self.freedResources.add(resourceID)
+            self.freedSinceFullWake.add(resourceID)
+        return Decision.OK
+
+    def finish(self, taskID):
+        '''
+        Deregisters a task that's done, freeing whatever it still holds
+        '''
+        self.retire(taskID)
+        return Decision.OK
+
+    def abort(self, taskID):
+        '''
+        Deregisters a task that was aborted, freeing whatever it held
+        '''
+        self.retire(taskID)
+
+
+    def isSafe(self, taskID, resourceID, numUnits):
+        '''
+        True if the units are available and granting them leaves the system
+        in a safe state, false otherwise (see SafetyEngine)
+        '''
+        if numUnits > self.safety.available[resourceID - 1]:
+            return False
+
+        return self.safety.isSafe(taskID, resourceID, numUnits)
+
+    def grant(self, taskID, resourceID, numUnits):
+        '''
+        Hands units over to the task
+        '''
+        self.held[taskID][resourceID - 1] += numUnits
+        self.safety.grantResource(taskID, resourceID, numUnits)
+
+    def retire(self, taskID):
+        '''
+        Frees the units a task holds and stops tracking it
+        '''
+        self.leaveWaiting(taskID)
+
+        for rID, numUnits in enumerate(self.held.pop(taskID), 1):
+            if numUnits:
+                self.safety.freeUnits(rID, numUnits)
+        del self.claims[taskID]
+        self.safety.retireTask(taskID)
+        self.tasksRetired = True
+
+    def leaveWaiting(self, taskID):
+        '''
+        Takes the task's request out of the waiting ones (if it's among them)
+        '''
+        if taskID in self.waiting:
+            resourceID = self.waiting.pop(taskID)[0]
+            del self.waitQueues[resourceID][taskID]
+
+
+    def isFullWake(self):
+        '''
+        True if every waiting request has to be retried (see wakeWaiting()),
+        false otherwise
+        '''
+        return self.tasksRetired or (bool(self.freedSinceFullWake) and
+            len(self.waiting) == len(self.claims))
+
+    def hasWakeups(self):
+        '''
+        True if some waiting requests have to be retried (see wakeWaiting()),
+        false otherwise
+        '''
+        return bool(self.waiting) and (self.isFullWake() or
+            any(self.waitQueues[rID] for rID in self.freedResources))
+
+    def wakeWaiting(self):
+        '''
+        Grants the waiting requests that became safe, in the order they were
+        made, and returns them as a list of (task ID, waiter). Only the
+        requests for resources whose units were released since the last time
+        are retried, unless tasks were retired (which can make any request
+        safe) or every task is waiting. Note that a release can make a
+        request for another resource safe as well: such a request is
+        retried once a task is retired, units of its resource are released
+        or all tasks wait, so the tasks can't all be left waiting on one.
+        '''
+        if self.isFullWake():
+            taskIDs = self.waiting.keys()
+            self.freedSinceFullWake = set()
+        else:
+            queues = [self.waitQueues[rID] for rID in self.freedResources]
+            taskIDs = [taskID for queue in queues for taskID in queue]
+            if len(queues) > 1: # Back in the order they were told to wait
+                taskIDs.sort(key=lambda taskID:
+                    self.waitQueues[self.waiting[taskID][0]][taskID])
+
+        self.freedResources = set()
+        self.tasksRetired = False
+
+        woken = []
+        for taskID in taskIDs:
+            resourceID, numUnits, waiter = self.waiting[taskID]
+            if self.isSafe(taskID, resourceID, numUnits):
+                self.leaveWaiting(taskID)
+                self.grant(taskID, resourceID, numUnits)
+                woken.append((taskID, waiter))
+
+        return woken
+
+
+class AdmissionConnection(asynchat.async_chat):
+    '''
+    Speaks the line protocol of the admission server with one client. Every
+    line is an instruction in the format of the input files, minus the delay
+    ("initiate", "request", "release" or "terminate", task ID, resource ID,
+    units), and is answered with "<decision> <task ID>". A task told to wait
+    gets "grant <task ID>" once the request is granted. "info" is answered
+    with "units" followed by the units of each resource.
+    '''
+
+    def __init__(self, sock, server):
+        asynchat.async_chat.__init__(self, sock)
+        self.set_terminator("\n")
+        self.server = server
+        self.controller = server.controller
+        self.buffer = []
+        self.taskIDs = set() # Registered through this connection
+
+    def collect_incoming_data(self, data):
+        self.buffer.append(data)
+
+    def found_terminator(self):
+        line = "".join(self.buffer)
+        self.buffer = []
+        self.push(self.handleLine(line) + "\n")
+
+        if self.controller.hasWakeups():
+            self.server.wakeWaiting()
+
+    def handleLine(self, line):
+        '''
+        Carries out one instruction and returns the reply
+        '''
+        tokens = line.split()
+        if tokens == ["info"]:
+            return "units " + " ".join(str(u) for u in self.controller.units)
+
+        try:
+            command = tokens[0]
+            taskID, resourceID, numUnits = [int(x) for x in tokens[1:4]]
+        except (IndexError, ValueError):
+            return Decision.ERROR + " 0 malformed instruction"
+
+        reply = " " + str(taskID)
+        if not 1 <= taskID <= self.controller.maxTasks:
+            return Decision.ERROR + reply + " unknown task"
+        if command == "initiate":
+            if taskID not in self.taskIDs and taskID in self.controller.claims:
+                return Decision.ERROR + reply + " task in use"
+        elif( taskID not in self.taskIDs
+            or taskID not in self.controller.claims ):
+            return Decision.ERROR + reply + " task not initiated"
+        if( command != "terminate" and
+            not 1 <= resourceID <= len(self.controller.units) ):
+            return Decision.ERROR + reply + " unknown resource"
+        if numUnits < 0:
+            return Decision.ERROR + reply + " negative units"
+        if taskID in self.controller.waiting:
+            return Decision.ERROR + reply + " task is waiting"
+
+        if command == "initiate":
+            self.taskIDs.add(taskID)
+            decision = self.controller.claim(taskID, resourceID, numUnits)
+        elif command == "request":
+            decision = self.controller.request(taskID, resourceID, numUnits,
+                self)
+        elif command == "release":
+            decision = self.controller.release(taskID, resourceID, numUnits)
+        elif command == "terminate":
+            decision = self.controller.finish(taskID)
+        else:
+            return Decision.ERROR + reply + " unknown command"
+
+        if taskID not in self.controller.claims:
+            self.taskIDs.discard(taskID)
+
+        return decision + reply
+
+    def handle_close(self):
+        '''
+        Frees the units of the client's tasks when it goes away
+        '''
+        for taskID in self.taskIDs:
+            if taskID in self.controller.claims:
+                self.controller.finish(taskID)
+        self.taskIDs = set()
+        if self.controller.hasWakeups():
+            self.server.wakeWaiting()
+        self.close()
+
+
+class AdmissionServer(asyncore.dispatcher):
+    '''
+    Listens on a Unix socket and serves every client with an
+    AdmissionConnection, all of them sharing one AdmissionController
+    '''
+
+    def __init__(self, socketPath, controller):
+        asyncore.dispatcher.__init__(self)
+        self.controller = controller
+
+        if os.path.exists(socketPath):
+            os.remove(socketPath)
+        self.create_socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.bind(socketPath)
+        self.listen(128)
+
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            AdmissionConnection(pair[0], self)
+
+    def wakeWaiting(self):
+        '''
+        Grants the waiting requests that became safe and tells their clients
+        '''
+        for taskID, connection in self.controller.wakeWaiting():
+            if connection.connected:
+                connection.push(Decision.GRANT + " " + str(taskID) + "\n")
+
+
+if __name__ == "__main__":
+    '''
+    Serves Banker's admission control on a Unix socket until interrupted
+    '''
+    parser = argparse.ArgumentParser(
+        description="Serves Banker's admission control on a Unix socket",
+        epilog="ex.: python2.7 AdmissionServer.py --units 10,10 "
+               "/tmp/admission.sock")
+    parser.add_argument("socketPath", help="Unix socket to listen on")
+    parser.add_argument("--units", required=True,
+        type=lambda text: [int(x) for x in text.split(",")],
+        help="comma-separated units of each resource type")
+    parser.add_argument("--tasks", type=int, default=1024,
+        help="most tasks at once (task IDs go from 1 to this)")
+    args = parser.parse_args()
+
+    server = AdmissionServer(args.socketPath,
+        AdmissionController(args.units, args.tasks))
+    # Clean up on termination as well as on an interrupt
+    signal.signal(signal.SIGTERM, lambda signum, frame: exit(0))
+    try:
+        asyncore.loop(timeout=1, use_poll=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.remove(args.socketPath)
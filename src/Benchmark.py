@@ -0,0 +1,150 @@
+#!/usr/bin/python2.7
+
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import argparse
+import itertools
+import multiprocessing
+
+from Simulation import ClockMode
+from Manager import (compileInputFile, simulateAlgorithm, parseManagers,
+    DEFAULT_MANAGERS)
+from Generator import DelayDistribution, generateWorkload
+
+
+def parseGrid(text):
+    '''
+    Parses a comma-separated list of sizes (ex. "10,100,1000")
+    '''
+    return [int(x) for x in text.split(",")]
+
+
+def benchmarkPoint(job):
+    '''
+    Unpacks a (workload parameters, manager, clock mode, repeats) job,
+    generates the workload and times simulateAlgorithm over it. Returns a
+    dict with the parameters, the best wall time of the repeats, the number
+    of cycles simulated per second of it and the process' peak RSS (KB).
+    Meant to run in a fresh process so that the peak RSS is its own.
+    '''
+    params, manager, clockMode, repeats = job
+
+    fd, filePath = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(fd, 'w') as file:
+            generateWorkload(file, params['tasks'],
+                [params['units']] * params['resources'],
+                params['instructions'], params['delay'],
+                params['delayDistribution'], params['claim'], params['seed'])
+
+        start = time.time()
+        program = compileInputFile(filePath)
+        compileTime = time.time() - start
+    finally:
+        os.remove(filePath)
+
+    wallTimes = []
+    for _ in range(repeats):
+        start = time.time()
+        stats = simulateAlgorithm(program, manager, clockMode)
+        wallTimes.append(time.time() - start)
+
+    result = dict(params)
+    result['manager'] = stats['meta']['manager']
+    result['clock'] = "tick" if clockMode is ClockMode.TICK else "event"
+    result['compileTime'] = compileTime
+    result['wallTime'] = min(wallTimes)
+    result['wallTimes'] = wallTimes
+    result['cycles'] = stats['meta']['cycles']
+    result['cyclesPerSecond'] = stats['meta']['cycles'] / max(min(wallTimes),
+        1e-9)
+    result['aborted'] = sum(1 for key, val in stats.items()
+        if key not in ('meta', 'total') and val['aborted'])
+    result['peakRSS'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return result
+
+
+def runBenchmarks(grid, managers, clockMode=ClockMode.EVENT, repeats=1):
+    '''
+    Benchmarks every combination of the grid's sizes for each manager and
+    returns the results (see benchmarkPoint(job)) in order. grid maps each
+    workload parameter to the list of its values. Points run one after the
+    other, each in a process of its own, so timings don't interfere.
+    '''
+    keys = sorted(grid.keys())
+    jobs = []
+    for values in itertools.product(*[grid[key] for key in keys]):
+        params = dict(zip(keys, values))
+        for manager in managers:
+            jobs.append((params, manager, clockMode, repeats))
+
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    try:
+        results = []
+        for result in pool.imap(benchmarkPoint, jobs):
+            sys.stderr.write("%(manager)-10s tasks=%(tasks)d "
+                "resources=%(resources)d units=%(units)d "
+                "instructions=%(instructions)d: %(wallTime).3fs\n" % result)
+            results.append(result)
+        return results
+    finally:
+        pool.terminate()
+
+
+if __name__ == "__main__":
+    '''
+    Times the managers (the optimistic and Banker's by default) over
+    synthetic workloads (see Generator.py) across a grid of sizes and writes
+    the results as JSON
+    '''
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the resource managers on synthetic workloads",
+        epilog="ex.: python2.7 Benchmark.py --tasks 10,50,250 "
+               "--resources 1,4 --output results.json")
+    parser.add_argument("--tasks", type=parseGrid, default=[10, 50, 250],
+        help="comma-separated numbers of tasks")
+    parser.add_argument("--resources", type=parseGrid, default=[1, 4],
+        help="comma-separated numbers of resource types")
+    parser.add_argument("--units", type=parseGrid, default=[100],
+        help="comma-separated units of each resource type")
+    parser.add_argument("--instructions", type=parseGrid, default=[10],
+        help="comma-separated requests and releases per task")
+    parser.add_argument("--delay", type=float, default=2,
+        help="mean instruction delay")
+    parser.add_argument("--delay-distribution",
+        default=DelayDistribution.UNIFORM, choices=DelayDistribution.ALL)
+    parser.add_argument("--claim", type=float, default=0.2,
+        help="fraction of each resource's units that tasks claim")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1,
+        help="times to run each point (the best one is reported)")
+    parser.add_argument("--managers", type=parseManagers,
+        default=DEFAULT_MANAGERS,
+        help="comma-separated managers to benchmark (default: "
+             "optimistic,banker)")
+    parser.add_argument("--tick", action="store_true",
+        help="advance the clock one cycle at a time")
+    parser.add_argument("--output", default=None,
+        help="file to write the JSON results to (default: stdout)")
+    args = parser.parse_args()
+
+    grid = {'tasks':args.tasks, 'resources':args.resources,
+        'units':args.units, 'instructions':args.instructions,
+        'delay':[args.delay], 'delayDistribution':[args.delay_distribution],
+        'claim':[args.claim], 'seed':[args.seed]}
+
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+
+    results = runBenchmarks(grid, args.managers, clockMode, args.repeat)
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print("")
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
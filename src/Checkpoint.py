@@ -0,0 +1,296 @@
+#!/usr/bin/python2.7
+
+import os
+import json
+import argparse
+
+import numpy
+
+from Simulation import Simulation, ClockMode
+from TaskStates import TaskStates
+from Policies import POLICIES, BankerPolicy
+from Manager import (loadInputFile, assembleStats, parseManagers,
+    printMessages, printReport, DEFAULT_MANAGERS)
+
+
+# Identifies (and versions) the checkpoint format
+MAGIC = "RMCKPT1"
+
+
+def saveCheckpoint(simulation, checkpointPath, filePath):
+    '''
+    Saves the state of a simulation that stopped in between two cycles (see
+    Simulation.simulate(stopAt)) to a compressed NumPy archive. The input's
+    instructions aren't saved, only the path of the input file they come
+    from along with every task's cursor into them.
+    '''
+    tasks = [simulation.tasks[x] for x in sorted(simulation.tasks.keys())]
+    resources = [simulation.resources[x]
+        for x in sorted(simulation.resources.keys())]
+    numResources = len(resources)
+    safety = simulation.safety
+
+    def matrix(attribute):
+        # Units of each resource (columns) in a dict of each task (rows),
+        # and whether the dict has an entry for it
+        units = numpy.zeros((len(tasks), numResources), dtype=numpy.int64)
+        present = numpy.zeros((len(tasks), numResources), dtype=bool)
+        for row, task in enumerate(tasks):
+            for rID, numUnits in getattr(task, attribute).iteritems():
+                units[row, rID - 1] = numUnits
+                present[row, rID - 1] = True
+        return units, present
+
+    held, heldPresent = matrix('heldResources')
+    claims, claimsPresent = matrix('claims')
+
+    meta = {'magic':MAGIC, 'file':os.path.abspath(filePath),
+        'manager':simulation.manager, 'sysClock':simulation.sysClock,
+        'messages':simulation.messages,
+        'safetyChecks':[safety.hits, safety.misses, safety.skips]}
+
+    with open(checkpointPath, 'wb') as file:
+        numpy.savez_compressed(file,
+            meta=numpy.array(json.dumps(meta)),
+            currInstruction=[t.currInstruction for t in tasks],
+            rollbackPoint=[t.rollbackPoint for t in tasks],
+            numPreemptions=[t.numPreemptions for t in tasks],
+            remainingDelay=[t.remainingDelay for t in tasks],
+            state=[(t.waiting, t.finished, t.aborted) for t in tasks],
+            running=[t.stats['running'] for t in tasks],
+            waiting=[t.stats['waiting'] for t in tasks],
+            held=held, heldPresent=heldPresent,
+            claims=claims, claimsPresent=claimsPresent,
+            waitingOrder=numpy.array(simulation.waitingTasks.keys(),
+                dtype=numpy.int64),
+            units=[(r.numTotUnits, r.numAvailableUnits, r.numBusyUnits)
+                for r in resources],
+            available=safety.available, allocation=safety.allocation,
+            need=safety.need, active=safety.active)
+
+
+def loadCheckpoint(checkpointPath, program, manager=None,
+                   clockMode=ClockMode.EVENT, unitChanges=None):
+    '''
+    Restores a Simulation of the program from a checkpoint, ready to carry
+    on from where it stopped. The manager (the one that was simulated by
+    default) and the clock mode may differ from the original run's, and
+    unitChanges may map resource IDs to a number of units to add to (or,
+    if negative, take away from) the resource.
+    Claims that the original manager didn't record (e.g. the optimistic
+    one's) are recorded from the initiates the tasks have already run (see
+    restoreClaims).
+    '''
+    with open(checkpointPath, 'rb') as file:
+        archive = numpy.load(file)
+        data = {key:archive[key] for key in archive.files}
+
+    meta = json.loads(str(data['meta']))
+    if meta.get('magic') != MAGIC:
+        raise IOError("Not a checkpoint: '" + checkpointPath + "'")
+    if data['held'].shape != (program.numTasks, program.numResources):
+        raise ValueError("Checkpoint doesn't match the input (" +
+            meta['file'] + ")")
+
+    if manager is None:
+        manager = meta['manager']
+    simulation = Simulation(program, manager, clockMode)
+    simulation.sysClock = meta['sysClock']
+    simulation.messages = meta['messages']
+
+    # Tasks (whose states are counted anew)
+    simulation.states = TaskStates()
+    for row, taskID in enumerate(sorted(simulation.tasks.keys())):
+        task = simulation.tasks[taskID]
+        task.states = simulation.states
+        task.currInstruction = int(data['currInstruction'][row])
+        task.remainingDelay = int(data['remainingDelay'][row])
+        if 'rollbackPoint' in data: # (saved since tasks can be preempted)
+            task.rollbackPoint = int(data['rollbackPoint'][row])
+            task.numPreemptions = int(data['numPreemptions'][row])
+        task.waiting, task.finished, task.aborted = \
+            [bool(x) for x in data['state'][row]]
+        task.stats = {'running':int(data['running'][row]),
+            'waiting':int(data['waiting'][row])}
+        task.heldResources = {col + 1:int(data['held'][row, col])
+            for col in numpy.flatnonzero(data['heldPresent'][row])}
+        task.claims = {col + 1:int(data['claims'][row, col])
+            for col in numpy.flatnonzero(data['claimsPresent'][row])}
+
+        if task.isActive():
+            simulation.states.addTask(task)
+
+    # Waiting tasks, charged up to the checkpoint's cycle, are queued in
+    # order (and all of them retried in the first cycle)
+    for taskID in data['waitingOrder']:
+        task = simulation.tasks[int(taskID)]
+        task.waitingSince = simulation.sysClock
+        simulation.waitTask(task,
+            task.instructions.getInstruction(task.currInstruction))
+    simulation.wakeAll()
+
+    for rID, (total, available, busy) in enumerate(data['units'], 1):
+        resource = simulation.resources[rID]
+        resource.numTotUnits = int(total)
+        resource.numAvailableUnits = int(available)
+        resource.numBusyUnits = int(busy)
+
+    # Matrices of the safety engine (the needs are sorted anew)
+    safety = simulation.safety
+    safety.available[:] = data['available']
+    safety.allocation[:] = data['allocation']
+    safety.active[:] = data['active']
+    safety.need[:] = data['need']
+    safety.sortNeeds()
+    # (checkpoints saved before skips were counted have no third entry)
+    safety.hits, safety.misses, safety.skips = \
+        (list(meta['safetyChecks']) + [0])[:3]
+
+    for rID, numUnits in (unitChanges or {}).iteritems():
+        changeUnits(simulation, rID, numUnits)
+
+    restoreClaims(simulation)
+
+    return simulation
+
+
+def restoreClaims(simulation):
+    '''
+    Records the claims of the initiates that each active task has already
+    run but that weren't recorded (the Banker's algorithm relies on every
+    claim). Raises a ValueError if the Banker's algorithm is to carry on and
+    a claim exceeds the units of its resource, as it would have aborted the
+    task before the run began, or if the state is unsafe (e.g. deadlocked
+    by the optimistic manager), as it would never grant anything again.
+    '''
+    isBanker = isinstance(simulation.policy, BankerPolicy)
+
+    for taskID in sorted(simulation.tasks.keys()):
+        task = simulation.tasks[taskID]
+        if not task.isActive():
+            continue
+
+        for index in range(task.currInstruction):
+            instruction = task.instructions.getInstruction(index)
+            rID = instruction.resourceType
+            if instruction.command != "initiate" or rID in task.claims:
+                continue
+
+            if isBanker and (rID not in simulation.resources or
+                    instruction.numUnits >
+                    simulation.resources[rID].numTotUnits):
+                raise ValueError("Task " + str(taskID) + "'s claim for " +
+                    "resource " + str(rID) + " (" +
+                    str(instruction.numUnits) + ") exceeds the number of " +
+                    "units present, so Banker's algorithm can't carry on " +
+                    "from this checkpoint")
+
+            task.setClaims(rID, instruction.numUnits)
+            if rID in simulation.resources:
+                simulation.safety.setClaims(taskID, rID,
+                    instruction.numUnits)
+
+    if isBanker and not simulation.safety.isStateSafe():
+        raise ValueError("The checkpoint's state is unsafe, so Banker's " +
+            "algorithm can't carry on from it")
+
+
+def changeUnits(simulation, resourceID, numUnits):
+    '''
+    Adds units to a resource (or, if negative, takes away available ones)
+    '''
+    resource = simulation.resources[resourceID]
+    if resource.numAvailableUnits + numUnits < 0:
+        raise ValueError("Resource " + str(resourceID) + " only has " +
+            str(resource.numAvailableUnits) + " available units")
+
+    resource.numTotUnits += numUnits
+    resource.numAvailableUnits += numUnits
+    simulation.safety.freeUnits(resourceID, numUnits)
+
+
+def parseUnitChange(text):
+    '''
+    Parses a change of units of a resource: "<resource ID>=<+/-units>"
+    (ex. "2=+3")
+    '''
+    try:
+        resourceID, numUnits = text.split("=")
+        return int(resourceID), int(numUnits)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid change of units '" + text +
+            "' (ex. 2=+3)")
+
+
+if __name__ == "__main__":
+    '''
+    Saves the state of a simulation at a given cycle, or resumes simulations
+    from a saved state (possibly with other managers or units) and prints
+    their stats
+    '''
+    parser = argparse.ArgumentParser(
+        description="Checkpoints simulations and forks them off checkpoints",
+        epilog="ex.: python2.7 Checkpoint.py save input-02.txt 5000 "
+               "state.npz; python2.7 Checkpoint.py resume input-02.txt "
+               "state.npz --units 2=+3")
+    subparsers = parser.add_subparsers(dest="command")
+
+    saveParser = subparsers.add_parser("save",
+        help="simulate up to a cycle and save the state")
+    saveParser.add_argument("filePath", help="input file")
+    saveParser.add_argument("cycle", type=int, help="cycle to stop at")
+    saveParser.add_argument("checkpointPath", help="checkpoint to write")
+    saveParser.add_argument("--manager", choices=POLICIES.keys(),
+        default=DEFAULT_MANAGERS[0], help="manager to simulate "
+        "(default: optimistic)")
+
+    resumeParser = subparsers.add_parser("resume",
+        help="carry on from a checkpoint and print the stats")
+    resumeParser.add_argument("filePath", help="input file")
+    resumeParser.add_argument("checkpointPath", help="checkpoint to read")
+    resumeParser.add_argument("--managers", type=parseManagers, default=None,
+        help="comma-separated managers to carry on with (default: the "
+             "checkpoint's)")
+    resumeParser.add_argument("--units", type=parseUnitChange,
+        action="append", default=[], help="units to add to a resource "
+        "(ex. 2=+3, or 2=-1 to take one away); may be repeated")
+
+    for subparser in (saveParser, resumeParser):
+        subparser.add_argument("--tick", action="store_true",
+            help="advance the clock one cycle at a time")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.filePath):
+        print("\nCan't find: '" + args.filePath + "'.\n"); exit(0)
+
+    program = loadInputFile(args.filePath)
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+
+    if args.command == "save":
+        simulation = Simulation(program, args.manager, clockMode)
+        simulation.simulate(args.cycle)
+        saveCheckpoint(simulation, args.checkpointPath, args.filePath)
+        print("Saved " + POLICIES[simulation.manager].NAME + " at cycle " +
+            str(simulation.sysClock) + (" (finished)"
+            if simulation.isFinished() else "") + ".")
+
+    else:
+        unitChanges = dict(args.units)
+        for rID, numUnits in unitChanges.iteritems():
+            if not 1 <= rID <= program.numResources:
+                resumeParser.error("unknown resource " + str(rID) + " (the "
+                    "input has " + str(program.numResources) + ")")
+
+        globalStats = []
+        for manager in (args.managers or [None]):
+            try:
+                simulation = loadCheckpoint(args.checkpointPath, program,
+                    manager, clockMode, unitChanges)
+            except ValueError as error:
+                resumeParser.error(str(error))
+            stats = assembleStats(simulation.simulate(), simulation.manager)
+            stats['meta']['messages'] = simulation.messages
+            globalStats.append(stats)
+
+        printMessages(globalStats)
+        printReport(globalStats)
@@ -0,0 +1,119 @@
+#!/usr/bin/python2.7
+
+import math
+import random
+import argparse
+
+
+class DelayDistribution:
+    '''
+    Mimic enums for the ways instruction delays can be drawn
+    '''
+    FIXED = "fixed" # Always the mean
+    UNIFORM = "uniform" # Uniform between 0 and twice the mean
+    EXPONENTIAL = "exponential" # Geometric (discretized exponential) with
+                                # the given mean
+
+    ALL = (FIXED, UNIFORM, EXPONENTIAL)
+
+
+def drawDelay(rand, mean, distribution):
+    '''
+    Draws a (non-negative, integer) delay from the given distribution. The
+    exponential draw is rounded down with a rate of log(1 + 1 / mean), which
+    makes it geometric with the given mean (rounding down an exponential
+    draw with a rate of 1 / mean would bias it low).
+    '''
+    if distribution == DelayDistribution.FIXED or not mean:
+        return int(mean)
+    elif distribution == DelayDistribution.UNIFORM:
+        return rand.randint(0, int(2 * mean))
+    else:
+        return int(rand.expovariate(math.log(1 + 1.0 / mean)))
+
+
+def generateTask(rand, taskID, units, numInstructions, delayMean,
+                 delayDistribution, claimTightness):
+    '''
+    Yields the instructions of one task as lines of an input file: a claim
+    for every resource, numInstructions requests and releases that never go
+    over the claims, the release of whatever is still held and a terminate.
+    claimTightness is the fraction of each resource's units that is claimed.
+    '''
+    claims = [max(1, int(round(claimTightness * u))) for u in units]
+    held = [0] * len(units)
+
+    def line(command, resourceID, numUnits):
+        delay = drawDelay(rand, delayMean, delayDistribution)
+        return "%-9s %d %d %d %d" % (command, taskID, delay, resourceID,
+            numUnits)
+
+    for rID, claim in enumerate(claims, 1):
+        yield "%-9s %d %d %d %d" % ("initiate", taskID, 0, rID, claim)
+
+    for _ in range(numInstructions):
+        r = rand.randrange(len(units))
+        if held[r] and (held[r] == claims[r] or rand.random() < 0.5):
+            numUnits = rand.randint(1, held[r])
+            held[r] -= numUnits
+            yield line("release", r + 1, numUnits)
+        else:
+            numUnits = rand.randint(1, claims[r] - held[r])
+            held[r] += numUnits
+            yield line("request", r + 1, numUnits)
+
+    for r, numUnits in enumerate(held):
+        if numUnits:
+            yield line("release", r + 1, numUnits)
+
+    yield line("terminate", 0, 0)
+
+
+def generateWorkload(file, numTasks, units, numInstructions, delayMean=0,
+                     delayDistribution=DelayDistribution.FIXED,
+                     claimTightness=0.5, seed=None):
+    '''
+    Writes a valid input file with the given number of tasks and units of
+    each resource (see generateTask for the rest of the parameters). The
+    same seed always yields the same workload.
+    '''
+    rand = random.Random(seed)
+
+    file.write("%d %d %s\n" % (numTasks, len(units),
+        " ".join(str(u) for u in units)))
+
+    for taskID in range(1, numTasks + 1):
+        for line in generateTask(rand, taskID, units, numInstructions,
+                delayMean, delayDistribution, claimTightness):
+            file.write(line + "\n")
+
+
+if __name__ == "__main__":
+    '''
+    Writes a synthetic input file for Manager.py
+    '''
+    parser = argparse.ArgumentParser(
+        description="Generates synthetic workloads for Manager.py",
+        epilog="ex.: python2.7 Generator.py --tasks 1000 --resources 2 "
+               "--units 50 workload.txt")
+    parser.add_argument("filePath", help="input file to write")
+    parser.add_argument("--tasks", type=int, default=10)
+    parser.add_argument("--resources", type=int, default=1,
+        help="number of resource types")
+    parser.add_argument("--units", type=int, default=10,
+        help="units of each resource type")
+    parser.add_argument("--instructions", type=int, default=4,
+        help="requests and releases per task")
+    parser.add_argument("--delay", type=float, default=0,
+        help="mean instruction delay")
+    parser.add_argument("--delay-distribution",
+        default=DelayDistribution.FIXED, choices=DelayDistribution.ALL)
+    parser.add_argument("--claim", type=float, default=0.5,
+        help="fraction of each resource's units that tasks claim")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.filePath, 'w') as file:
+        generateWorkload(file, args.tasks, [args.units] * args.resources,
+            args.instructions, args.delay, args.delay_distribution,
+            args.claim, args.seed)
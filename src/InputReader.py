@@ -0,0 +1,43 @@
+from InstructionTable import CommandType
+
+
+def readOutline(file):
+    '''
+    Reads the first line of an input file: the number of tasks, the number of
+    resource types and the number of units of each resource
+    '''
+    return [int(s) for s in file.readline().split()]
+
+
+def readInstructions(file):
+    '''
+    Generator that reads the rest of an input file in a single pass, a line at
+    a time, and yields one (command code, task ID, delay, resource type,
+    number of units) tuple per instruction. An instruction is a command
+    followed by its numbers, wherever the line breaks fall.
+    '''
+    command = None
+    numbers = []
+
+    for line in file:
+        for token in line.split():
+            if token.isdigit():
+                numbers.append(int(token))
+                continue
+
+            if command is not None:
+                yield makeInstruction(command, numbers)
+            command = token
+            numbers = []
+
+    if command is not None:
+        yield makeInstruction(command, numbers)
+
+
+def makeInstruction(command, numbers):
+    '''
+    Packs a command and its numbers into an instruction tuple
+    (see readInstructions(file))
+    '''
+    taskID, delay, resourceType, numUnits = numbers[:4]
+    return (CommandType.CODES[command], taskID, delay, resourceType, numUnits)
@@ -0,0 +1,69 @@
+from array import array
+
+from Instruction import Instruction
+
+
+class CommandType:
+    '''
+    Mimic enums for the commands an instruction can carry (stored as codes)
+    '''
+    INITIATE = 0
+    REQUEST = 1
+    RELEASE = 2
+    TERMINATE = 3
+
+    # Maps codes to the commands' names and vice versa
+    NAMES = ("initiate", "request", "release", "terminate")
+    CODES = {name:code for code, name in enumerate(NAMES)}
+
+
+class InstructionTable:
+    '''
+    Stores a task's instructions as a struct of typed arrays (one entry per
+    instruction in each) rather than as a list of Instruction objects, which
+    keeps the memory used close to the size of the raw data. Note that the
+    table is only appended to while its Program is being compiled, and that
+    it may instead wrap existing columns (e.g. views onto a memory-mapped
+    trace, see TraceCache.py).
+    '''
+
+    def __init__(self, taskID, columns=None):
+        self.taskID = taskID # Task the instructions belong to
+
+        if columns is None:
+            columns = (array('B'), array('i'), array('i'), array('i'))
+
+        # Command codes (see CommandType), delays, resource types and units
+        self.commands, self.delays, self.resourceTypes, self.numUnits = \
+            columns
+
+
+    def __len__(self):
+        '''
+        Gets the number of instructions
+        '''
+        return len(self.commands)
+
+    def append(self, command, delay, resourceType, numUnits):
+        '''
+        Adds an instruction (given its command code) to the end of the table
+        '''
+        self.commands.append(command)
+        self.delays.append(delay)
+        self.resourceTypes.append(resourceType)
+        self.numUnits.append(numUnits)
+
+    def getDelay(self, index):
+        '''
+        Gets the delay of the instruction at the given index
+        '''
+        return int(self.delays[index])
+
+    def getInstruction(self, index):
+        '''
+        Builds an Instruction object out of the entries at the given index
+        (its delay is the compiled one, not what's left of it during a run)
+        '''
+        return Instruction(CommandType.NAMES[self.commands[index]],
+            self.taskID, int(self.delays[index]),
+            int(self.resourceTypes[index]), int(self.numUnits[index]))
@@ -0,0 +1,125 @@
+#!/usr/bin/python2.7
+
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+
+import numpy
+
+from Generator import generateTask
+
+
+def runClient(socketPath, taskID, numTasks, numInstructions, claimTightness,
+              seed, latencies):
+    '''
+    Runs numTasks tasks one after the other over a connection of its own,
+    under the same task ID, and appends the latency of every request (from
+    sending it to its units being granted, waits included) to latencies.
+    The tasks' instructions are drawn like Generator.py's.
+    '''
+    rand = random.Random(seed)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(socketPath)
+    reader = sock.makefile('r')
+
+    def send(line):
+        sock.sendall(line + "\n")
+        return reader.readline().split()[0]
+
+    sock.sendall("info\n")
+    units = [int(u) for u in reader.readline().split()[1:]]
+
+    for _ in range(numTasks):
+        for line in generateTask(rand, taskID, units, numInstructions, 0,
+                "fixed", claimTightness):
+            command, _, _, resourceID, numUnits = line.split()
+            instruction = " ".join((command, str(taskID), resourceID,
+                numUnits))
+
+            start = time.time()
+            decision = send(instruction)
+            if decision == "wait":
+                decision = reader.readline().split()[0] # Granted later
+            if command == "request":
+                latencies.append(time.time() - start)
+
+            if decision == "abort":
+                break
+            if decision == "error":
+                raise IOError("Server refused '" + instruction + "'")
+
+    sock.close()
+
+
+def generateLoad(socketPath, numClients, numTasks, numInstructions,
+                 claimTightness=0.5, seed=None):
+    '''
+    Runs numClients clients at once (see runClient) and returns a dict with
+    the number of requests, the requests per second and the 50th and 99th
+    percentiles of their latencies (in milliseconds). Raises an IOError if
+    any client failed, as the numbers would leave its requests out.
+    '''
+    latencies = []
+    failures = [] # (client number, exception) of the clients that failed
+
+    def runClientThread(i):
+        try:
+            runClient(socketPath, i, numTasks, numInstructions,
+                claimTightness, None if seed is None else seed + i,
+                latencies)
+        except Exception as error:
+            failures.append((i, error))
+
+    clients = [threading.Thread(target=runClientThread, args=(i,))
+        for i in range(1, numClients + 1)]
+
+    start = time.time()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    wallTime = time.time() - start
+
+    if failures:
+        raise IOError("; ".join("Client " + str(i) + " failed: " + str(error)
+            for i, error in sorted(failures)))
+
+    p50, p99 = numpy.percentile(latencies, [50, 99]) * 1000 if latencies \
+        else (None, None)
+
+    return {'requests':len(latencies), 'wallTime':wallTime,
+        'requestsPerSecond':len(latencies) / wallTime, 'p50':p50, 'p99':p99}
+
+
+if __name__ == "__main__":
+    '''
+    Loads an admission server (see AdmissionServer.py) with concurrent
+    clients and prints the latency of its admission decisions as JSON
+    '''
+    parser = argparse.ArgumentParser(
+        description="Loads an admission server with concurrent clients",
+        epilog="ex.: python2.7 LoadGenerator.py --clients 16 "
+               "/tmp/admission.sock")
+    parser.add_argument("socketPath", help="Unix socket of the server")
+    parser.add_argument("--clients", type=int, default=8,
+        help="concurrent clients (each one uses the task ID of its number)")
+    parser.add_argument("--tasks", type=int, default=100,
+        help="tasks each client runs one after the other")
+    parser.add_argument("--instructions", type=int, default=10,
+        help="requests and releases per task")
+    parser.add_argument("--claim", type=float, default=0.5,
+        help="fraction of each resource's units that tasks claim")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        load = generateLoad(args.socketPath, args.clients, args.tasks,
+            args.instructions, args.claim, args.seed)
+    except IOError as error:
+        sys.exit(str(error))
+
+    print(json.dumps(load, indent=2, sort_keys=True))
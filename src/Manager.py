@@ -1,388 +1,200 @@
 #!/usr/bin/python2.7
 
+import os
 import sys
-import re
-import copy
-from collections import OrderedDict
+import json
+import shutil
+import tempfile
+import argparse
+import multiprocessing
 
-from Task import Task
-from Resource import Resource
-from Instruction import Instruction
+from Simulation import Simulation, ManagerType, ClockMode
+from Program import Program
+from InputReader import readOutline, readInstructions
+from Policies import POLICIES, OptimisticPolicy, PreemptivePolicy
+from Profiler import Profiler
+from Recorder import UtilizationRecorder
+from Tracer import TaskTracer
+from Reporter import (TaskReporter, ROW_WRITERS, getTaskStats, renderTable,
+    renderComparison, renderSummaries)
+import TraceCache
 
 
-# Maps all task IDs to all Task objects
-tasks = {}
-# Maps task IDs to waiting tasks (in order tasks were told to wait)
-waitingTasks = OrderedDict()
-# Tasks are placed here when they are freed from waiting
-# (makes sure tasks are only processed once per cycle)
-readyTasks = []
+# Managers that are simulated unless others are selected
+DEFAULT_MANAGERS = [ManagerType.OPTIMISTIC, ManagerType.BANKER]
 
-# Maps resource IDs to Resource objects
-resources = {}
-# Maps resource IDs to number of units that will be freed.
-# (freed units are placed here until the ends of the cycles)
-freeBuffer = {}
 
-# Reset for each run
-sysClock = 0;
-
-class ManagerType:
-    '''
-    Mimic enums for required resource management algorithms
-    '''
-    OPTIMISTIC = 1
-    BANKER = 2
-
-
-def parseInputData(outline, instructions):
-    '''
-    Reads data from input file and builds the 'resources' and 'tasks' structures
-    '''
-    global tasks, resources # Modify the global variables
-    tasks = {x:Task(x) for x in range(1, outline[0] + 1)}
-
-    numResources = outline[1] + 1
-    resources = {x:Resource(x, outline[x + 1]) for x in range(1, numResources)}
-
-    pat = re.compile('\w+')
-    for item in instructions:
-        matches = pat.findall(item)
-
-        command     = matches[0]
-        taskID      = int(matches[1])
-        delay       = int(matches[2])
-        resourceType= int(matches[3])
-        numUnits    = int(matches[4])
-
-        ins = Instruction(command, taskID, delay, resourceType, numUnits)
-        tasks[taskID].addInstruction(ins)
-
-
-def isFinished():
-    '''
-    True if there are no more active tasks in the process, false otherwise
-    '''
-    for task in tasks.values():
-        if( task.isActive() ):
-            return False
-
-    return True
-
-
-def isDeadlocked():
-    '''
-    True if all active tasks are waiting, false otherwise
-    (relevant to the optimistic algorithm)
-    '''
-    for task in tasks.values():
-        if( task.isActive() and not task.isWaiting() ):
-            return False
-
-    return not isFinished() # If it's finished, it's not deadlocked
-
-
-def isSafe(task, instruction):
-    '''
-    Determines if a given task + instruction leads to a safe state and returns
-    true if so, false otherwise.
-
-    Dijkstra's algorithm to determine if a state is safe:
-        1. State is safe if no tasks are left
-        2. Look for task whose requests for all resources can be fulfilled
-            -   If none exist, state is not safe
-            -   Else: pretend to grant all resources to it, terminate it and
-                continue to apply this method until all tasks are processed
-    '''
-    if isFinished(): return True
-
-    # Abort task if it exceeds its claim
-    if instruction.numUnits > task.getMaxAddl()[instruction.resourceType]:
-        if task.id in waitingTasks.keys():
-            del waitingTasks[task.id]
-
-        for rID in task.heldResources.keys():
-            placeIntoFreeBuffer(rID, task.heldResources[rID])
-
-        task.abort()
-
-        # Print informative message
-        msg =   "During cycle " + str(sysClock) + "-" + str(sysClock+1)
-        msg +=  " of Banker's algorithm\n"
-        msg +=  "\tTask " + str(task.id)
-        msg +=  "'s request exceeds its claim; aborted; "
-        msg +=  str(instruction.numUnits) + " units available next cycle"
-        print(msg)
-        return False
-
-
-    # Map resource ID to number of available units (copied structure)
-    simResources = {rID:r.numAvailableUnits for rID, r in resources.iteritems()}
-    # Map task ID to task object
-    simTasks = {}
-    for tID, t in tasks.iteritems():
-        if t.isActive():
-            simTasks[tID] = copy.deepcopy(t) # Copies full object
-
-    # Pretend to grant the request
-    wResourceID = instruction.resourceType
-    wUnits = instruction.numUnits
-    simResources[wResourceID] -= wUnits
-    simTasks[task.id].grantResource(wResourceID, wUnits)
-
-    while simTasks: # There should be tasks available
-        availTask = getFulfillableTask(simResources, simTasks)
-
-        if availTask: # Free its resources and delete it
-            for rID, units in availTask.heldResources.items():
-                simResources[rID] += units
-            del simTasks[availTask.id]
-        else:
-            return False
-
-
-    return True
-
-
-def getFulfillableTask(maxResources, tasks):
+def parseManagers(text):
     '''
-    Returns any task whose max. additional requests fit within the set of
-    currently available resources
+    Parses a comma-separated list of keys of the registry of policies
+    (ex. "optimistic,banker,srnf")
     '''
-    for task in tasks.values():
-        resourceSet = task.getMaxAddl() # Maps resource ID to count of units
-        isValid = True
+    managers = text.split(",")
+    for manager in managers:
+        if manager not in POLICIES:
+            raise argparse.ArgumentTypeError("unknown manager '" + manager +
+                "' (choose from " + ", ".join(POLICIES.keys()) + ")")
 
-        for rID in resourceSet.keys():
-            if resourceSet[rID] > maxResources[rID]:
-                isValid = False; break
+    return managers
 
-        if isValid:
-            return task
 
-    return None
-
-
-def getLowestDeadlockedTask():
+def compileInputFile(filePath):
     '''
-    Returns the lowest (in terms of task ID) active task in the blocked list
+    Parses an input file in a single pass and compiles it into a Program
+    that any number of simulations can share
     '''
-    for task in tasks.values():
-        if( task.isWaiting() and task.isActive() ):
-            return task
-
-    return None
+    with open(filePath, 'r') as file:
+        outline = readOutline(file)
+        return Program(outline, readInstructions(file))
 
 
-def resolveDeadlock():
+def loadInputFile(filePath, cacheDir=None):
     '''
-    Abort the lowest numbered deadlocked task (in terms of task ID) and free
-    its resources). Repeat this process while there's deadlock.
-    (Relevant to the optimistic algorithm).
+    Compiles an input file, or memory-maps its binary trace from the cache
+    directory if one is given (see TraceCache.py)
     '''
-    while( isDeadlocked() ):
-        task = getLowestDeadlockedTask()
-        if not task: return
+    if cacheDir is None:
+        return compileInputFile(filePath)
 
-        heldResources = task.heldResources
-        for rID in heldResources.keys():
-            placeIntoFreeBuffer(rID, heldResources[rID])
+    return TraceCache.loadProgram(filePath, cacheDir, compileInputFile)
 
-        del waitingTasks[task.id]
-        task.abort()
 
-        cleanFreeBuffer()
-
-        for task in tasks.values():
-            if task.isActive():
-                ins = task.getCurrentInstruction()
-                if(ins.command == "request"):
-                    standardRequest(task, ins)
-                    if( not task.isWaiting() ):
-                        task.incInstruction()
-
-
-def placeIntoFreeBuffer(resourceID, numUnits):
+def simulateAlgorithm(program, manager, clockMode=ClockMode.EVENT,
+                      profile=False, reporter=None, utilization=False,
+                      tracePath=None):
     '''
-    Inserts mappings of resource IDs to corresponding units into a "buffer"
-    that's emptied once per cycle
+    Runs a fresh Simulation of the given resource manager over the compiled
+    program and returns its stats (see assembleStats(tasks, manager)).
+    If profile is set, the simulation is instrumented and the summary of
+    its phases goes into the stats' meta (see Profiler.py). If a reporter
+    is given, tasks are reported to it as they're done instead, and the
+    stats only hold its summary in their meta (see Reporter.py). If
+    utilization is set, the recorder of the resources' utilization goes
+    into the meta as well (see Recorder.py). If a trace path is given, the
+    timeline of every task is written to that file as it's simulated (see
+    Tracer.py).
     '''
-    global freeBuffer
+    recorder = UtilizationRecorder(program.units) if utilization else None
+    simulation = Simulation(program, manager, clockMode, reporter, recorder)
+    if profile:
+        profiler = Profiler()
+        profiler.instrument(simulation)
 
-    if( resourceID in freeBuffer.keys() ):
-        freeBuffer[resourceID] += numUnits
+    if tracePath is None:
+        tasks = simulation.simulate()
     else:
-        freeBuffer[resourceID] = numUnits
-
-
-def cleanFreeBuffer():
-    '''
-    Places the units corresponding to given resource IDs in the "buffer" into
-    the global structure of resources
-    '''
-    global freeBuffer
-
-    for rID in freeBuffer.keys():
-        resources[rID].freeUnits(freeBuffer[rID])
-        del freeBuffer[rID]
-
-
-def standardRequest(task, instruction):
-    '''
-    Fulfills the request if there are available resources
-    (called by all resource managing algorithms)
-    '''
-    if( instruction.delay ): # Nothing to do for now
-        instruction.delay -= 1; return
-
-    resource = resources[instruction.resourceType]
-
-    if( instruction.numUnits <= resource.numAvailableUnits ):
-        # Units can be granted!
-        task.stopWaiting() # Freed from waiting when request can be satisfied
-        readyTasks.append(task) # Note that tasks were "readified" on this cycle
-
-        if task.id in waitingTasks: # Leave the waiting tasks
-            del waitingTasks[task.id]
-
-        # The request can be fulfilled
-        if( resource.takeUnits(instruction.numUnits) ):
-            task.grantResource(resource.id, instruction.numUnits)
-
+        with open(tracePath, 'w') as traceFile:
+            tracer = TaskTracer(traceFile)
+            tracer.instrument(simulation)
+            tasks = simulation.simulate()
+            tracer.close()
+    if reporter is None:
+        stats = assembleStats(tasks, manager)
     else:
-        # Units can't be granted
-        task.wait() # Wait until resources become available
-        if not task.id in waitingTasks: # Enter the waiting tasks
-            waitingTasks[task.id] = task
-
+        stats = {'meta':{'manager':POLICIES[manager].NAME,
+            'summary':reporter.getSummary()}}
+
+    stats['meta']['messages'] = simulation.messages
+    stats['meta']['cycles'] = simulation.sysClock
+    # Banker's safety checks answered from the cache vs. computed (of which
+    # some were safe without simulating anything)
+    stats['meta']['safetyChecks'] = {'cached':simulation.safety.hits,
+        'computed':simulation.safety.misses,
+        'skipped':simulation.safety.skips}
+    if isinstance(simulation.policy, PreemptivePolicy):
+        stats['meta']['preemptions'] = sum(task.numPreemptions
+            for task in simulation.tasks.itervalues())
+    if profile:
+        stats['meta']['profile'] = profiler.summary()
+    if utilization:
+        stats['meta']['utilization'] = recorder
 
-def bankerRequest(task, instruction):
-    '''
-    Wrapper around standardRequest() that proceeds only if the state is safe
-    '''
-    if isSafe(task, instruction):
-        standardRequest(task, instruction)
-
-    else:
-        task.wait() # Wait until resources become available
-        if not task.id in waitingTasks: # Enter the waiting tasks
-            waitingTasks[task.id] = task
+    return stats
 
 
-def bankerProcessClaims(task, initInstruction):
+def simulateProgram(program, filePath, managers, clockMode=ClockMode.EVENT,
+                    profile=False, reportFormat="table", rowsFile=None,
+                    utilization=False, traceDir=None):
     '''
-    Aborts task if it's asking for unknown resources or way too many units
-    (analyzes the claims)
+    Simulates each of the managers over the compiled program of an input file
+    and returns the list of their stats. Unless the report is a table, tasks
+    are reported as they're done: their rows are streamed to rowsFile in the
+    given format ("csv" or "jsonl") and the stats only hold summaries. If a
+    trace directory is given, each simulation is traced to a file of its own
+    in it (see getTracePath).
     '''
-    rType = initInstruction.resourceType
-    rUnits = initInstruction.numUnits
+    globalStats = []
+    for manager in managers:
+        tracePath = None
+        if traceDir is not None:
+            tracePath = getTracePath(traceDir, filePath, manager)
 
-    if( not rType in resources.keys()
-        # Task is not getting accepted
-        or rUnits > resources[rType].numTotUnits ):
-        task.abort()
+        reporter = None
+        if reportFormat != "table":
+            writer = None
+            if reportFormat in ROW_WRITERS:
+                writer = ROW_WRITERS[reportFormat](rowsFile)
+            reporter = TaskReporter(POLICIES[manager].NAME, filePath, writer)
 
-        # Print informative message
-        msg =   "Banker aborts task " + str(task.id) + \
-                " before run begins:\n"
-        msg +=  "\tclaim for resource " + str(rType) + " (" + str(rUnits) + \
-                ") exceeds number of units present (" + \
-                str(resources[rType].numTotUnits) + ")"
-        print(msg)
+        globalStats.append( simulateAlgorithm(program, manager, clockMode,
+            profile, reporter, utilization, tracePath) )
 
-    else: # We're in!
-        task.setClaims(rType, rUnits)
+    return globalStats
 
 
-def execute(manager, task, instruction):
+def getTracePath(traceDir, filePath, manager):
     '''
-    Dispatcher for each type of request that a task can make
+    Returns the path of the trace of a manager's simulation of an input file
+    (named after both)
     '''
-    if( instruction.delay ): # Nothing to do for now
-        instruction.delay -= 1; return
-
-    if( instruction.command == "initiate" and
-        manager is ManagerType.BANKER ): # Only the Banker cares about claims
-        bankerProcessClaims(task, instruction)
-
-    if( instruction.command == "request" ):
-        if( manager is ManagerType.OPTIMISTIC ):
-            standardRequest(task, instruction)
-
-        elif( manager is ManagerType.BANKER ):
-            bankerRequest(task, instruction)
-
-
-    elif( instruction.command == "release" ):
-        resource = resources[instruction.resourceType]
-        # Fulfill the release (place items into freeBuffer)
-        if( instruction.numUnits <= resource.numBusyUnits ):
-            placeIntoFreeBuffer(resource.id, instruction.numUnits)
-            task.releaseResource(resource.id, instruction.numUnits)
+    name = os.path.splitext(os.path.basename(filePath))[0]
+    return os.path.join(traceDir, name + "-" + manager + ".json")
 
 
-    if task.isWaiting(): # Carry on and calculate stats
-        task.incWaitingTime()
-    else:
-        task.incInstruction()
-        if task.isFinished():
-            task.clockEndTime(sysClock)
-
-
-def run(manager):
+def simulateFile(job):
     '''
-    Proceeds while there are still active tasks, and follows this order:
-    1. Process blocked tasks in the order they were told to wait
-    2. Process non-blocked tasks
-    3. Check if there's deadlock (applies to optimistic manager)
+    Unpacks a (file path, managers, clock mode, cache directory, profile,
+    report format, utilization, trace directory) job, loads the file once
+    and simulates it for each manager (used by the worker processes of
+    simulateBatch). Rows are streamed into a temporary file whose path goes
+    into the stats' meta.
     '''
-    global sysClock, readyTasks
-
-    while not isFinished():
-        # Process blocked tasks in the order they were told to wait
-        for task in waitingTasks.values():
-            if task.isActive(): # Should be all
-                ins = task.getCurrentInstruction()
-                execute(manager, task, ins)
+    (filePath, managers, clockMode, cacheDir, profile, reportFormat,
+        utilization, traceDir) = job
+    program = loadInputFile(filePath, cacheDir)
 
-        # Process non-blocked tasks
-        for task in tasks.values():
-            if( task.isActive() and not task.isWaiting()
-                and not task in readyTasks ):
-                ins = task.getCurrentInstruction()
-                execute(manager, task, ins)
+    if reportFormat not in ROW_WRITERS:
+        return simulateProgram(program, filePath, managers, clockMode, profile,
+            reportFormat, None, utilization, traceDir)
 
-        readyTasks = [] # Reset ready tasks
+    fd, rowsPath = tempfile.mkstemp(suffix="." + reportFormat)
+    with os.fdopen(fd, 'w') as rowsFile:
+        globalStats = simulateProgram(program, filePath, managers, clockMode,
+            profile, reportFormat, rowsFile, utilization, traceDir)
 
-        # Check if there's deadlock (applies to optimistic manager)
-        if( manager is ManagerType.OPTIMISTIC and isDeadlocked() ):
-            resolveDeadlock()
+    for stats in globalStats:
+        stats['meta']['rowsPath'] = rowsPath
+    return globalStats
 
-        # Freed units didn't go into 'resources', but in this buffer to make
-        # sure that tasks don't use them more than one/cycle
-        cleanFreeBuffer()
-        sysClock += 1
 
-
-def simulateAlgorithm(manager):
+def simulateBatch(filePaths, clockMode=ClockMode.EVENT, numProcesses=None,
+                  cacheDir=None, profile=False, reportFormat="table",
+                  managers=DEFAULT_MANAGERS, utilization=False,
+                  traceDir=None):
     '''
-    Wrapper around run(manager) that resets global data structures before
-    initializing the execution of a given resource manager
+    Simulates the given managers (the optimistic and Banker's by default) for
+    each of the given input files across a pool of worker processes (one per
+    core by default). Returns one list of stats (one per manager) per file, in
+    the order the files were given.
     '''
-    # Reset data structures
-    global tasks, waitingTasks, readyTasks
-    tasks = {}; waitingTasks = OrderedDict(); readyTasks = []
-
-    global resources, freeBuffer
-    resources = {}; freeBuffer = {}
-
-    global sysClock
-    sysClock = 0
-
-    parseInputData(outline, instructions)
-    run(manager)
+    jobs = [(filePath, managers, clockMode, cacheDir, profile, reportFormat,
+        utilization, traceDir) for filePath in filePaths]
 
-    return assembleStats(tasks, manager)
+    pool = multiprocessing.Pool(numProcesses)
+    try:
+        return pool.map(simulateFile, jobs, chunksize=1)
+    finally:
+        pool.terminate()
 
 
 def assembleStats(tasks, manager):
@@ -413,37 +225,38 @@ def assembleStats(tasks, manager):
             percentWaiting: 44
             aborted: False
     '''
-    vals = {"taken":0, "waiting":0, "percentWaiting":0, "aborted":False}
-    stats = {task.id:copy.deepcopy(vals) for task in tasks.values()}
+    return addTotals(assembleTaskStats(tasks), manager)
 
-    # Individual tasks
-    for taskID in stats.keys():
-        if tasks[taskID].isAborted():
-            stats[taskID]['aborted'] = True
-            continue
 
-        currStats = tasks[taskID].stats
-        stats[taskID]['taken'] = currStats['running']
-        stats[taskID]['waiting'] = currStats['waiting']
-        stats[taskID]['percentWaiting'] = int(round(100.0 * \
-            currStats['waiting'] / currStats['running']))
+def assembleTaskStats(tasks):
+    '''
+    Returns a dict mapping each task's ID to a dict listing its statistics
+    (see assembleStats(tasks, manager))
+    '''
+    stats = {}
+    for task in tasks.values():
+        taken, waiting, percentWaiting = getTaskStats(task)
+        stats[task.id] = {"taken":taken, "waiting":waiting,
+            "percentWaiting":percentWaiting, "aborted":task.isAborted()}
+
+    return stats
+
 
+def addTotals(stats, manager):
+    '''
+    Adds the totals over the tasks and the meta to a dict mapping task IDs
+    to their statistics (see assembleStats(tasks, manager)), and returns it
+    '''
     # Totals
     totTaken = sum(ind['taken'] for ind in stats.values())
     totWaiting = sum(ind['waiting'] for ind in stats.values())
 
-    stats['total'] = copy.deepcopy(vals) # Separate entry for cumulative data
-    stats['total']['taken'] = totTaken
-    stats['total']['waiting'] = totWaiting
-    stats['total']['percentWaiting'] = int(round(100.0 * \
-            stats['total']['waiting'] / stats['total']['taken']))
+    stats['total'] = {"taken":totTaken, "waiting":totWaiting,
+        "percentWaiting":int(round(100.0 * totWaiting / totTaken)),
+        "aborted":False} # Separate entry for cumulative data
 
     # Set manager type
-    stats['meta'] = {}
-    if manager is ManagerType.OPTIMISTIC:
-        stats['meta']['manager'] = 'OPTIMISTIC'
-    elif manager is ManagerType.BANKER:
-        stats['meta']['manager'] = 'BANKER\'S'
+    stats['meta'] = {'manager':POLICIES[manager].NAME}
 
     return stats
 
@@ -451,91 +264,236 @@ def assembleStats(tasks, manager):
 def printReport(globalStats):
     '''
     Prints each task's set of stats according to the format specified by the
-    assignment
-    '''
-    report = "\n"
-    report += "\t"*3 + "FIFO" + "\t"*6 + "BANKER'S\n"
-    for i in range(1, len(globalStats[0].keys()) - 1):
-        report += "\t" + "Task " + str(i)
-
-        report += "\t"*2
-        if( globalStats[0][i]['aborted'] ):
-            report += "aborted" + "\t"*4
-        else:
-            report += str(globalStats[0][i]['taken'])
-            report += "\t"
-            report += str(globalStats[0][i]['waiting'])
-            report += "\t"
-            report += str(globalStats[0][i]['percentWaiting']) + "%"
-            report += "\t"*2
-
-
-        report += "Task " + str(i)
-        report += "\t"*2
-
-        if( globalStats[1][i]['aborted'] ):
-            report += "aborted" + "\t"*4
-        else:
-            report += str(globalStats[1][i]['taken'])
-            report += "\t"
-            report += str(globalStats[1][i]['waiting'])
-            report += "\t"
-            report += str(globalStats[1][i]['percentWaiting']) + "%"
-            report += "\t"*2
-
-        report += "\n"
-
-    report += "\t" + "total"
-    report += "\t"*2
-
-    report += str(globalStats[0]['total']['taken'])
-    report += "\t"
-    report += str(globalStats[0]['total']['waiting'])
-    report += "\t"
-    report += str(globalStats[0]['total']['percentWaiting']) + "%"
-
-    report += "\t"*2 + "total"
-    report += "\t"*2
-
-    report += str(globalStats[1]['total']['taken'])
-    report += "\t"
-    report += str(globalStats[1]['total']['waiting'])
-    report += "\t"
-    report += str(globalStats[1]['total']['percentWaiting']) + "%"
-    report += "\t"*2
-
-    report += "\n"
-    print(report)
+    assignment (see Reporter.renderTable)
+    '''
+    print(renderTable(globalStats))
 
 
-if __name__ == "__main__":
+def printComparison(globalStats):
     '''
-    Reads data outlining available resources as well as tasks' instructions
-    and executes the optimistic and Banker's resource managing algorithms.
-    Prints stats pertaining to the runtime of each algorithm at the end using
-    the format specified by printReport(globalStats).
+    Prints a line of totals per manager, to compare them (see
+    Reporter.renderComparison)
     '''
+    print(renderComparison(globalStats))
 
-    # Read given file from the command line
-    if len(sys.argv) == 2:
-        filePath = sys.argv[1]
-    else:
-        print("\nPlease restart the program and provide an input file.")
-        print("ex.:\n\tpython2.7 Manager.py input-02.txt\n")
-        exit(0)
 
-    try: file = file(filePath, 'r')
-    except IOError: print("\nCan't find: '" + filePath + "'.\n"); exit(0)
+def printMessages(globalStats):
+    '''
+    Prints the informative messages issued by each manager, in order
+    '''
+    for stats in globalStats:
+        for msg in stats['meta']['messages']:
+            print(msg)
 
-    # Read data from input file
-    global outline, instructions
-    outline = [int(s) for s in file.readline().split()]
-    instructions = re.findall(r'[a-z]+\s+[\d\s]+', file.read())
 
-    # Run for OPTIMISTIC and BANKER managers, and assemble stats
-    globalStats = []
+def printSafetyChecks(globalStats):
+    '''
+    Prints how many of each manager's safety checks were answered from the
+    cache and how many were computed, of which how many needed no simulation
+    (managers that made none are left out)
+    '''
+    for stats in globalStats:
+        checks = stats['meta']['safetyChecks']
+        if checks['cached'] or checks['computed']:
+            print(stats['meta']['manager'] + " safety checks: " +
+                str(checks['cached']) + " cached, " +
+                str(checks['computed']) + " computed (" +
+                str(checks['skipped']) + " without simulating)")
+
+
+def printPreemptions(globalStats):
+    '''
+    Prints how many times each preemptive manager preempted tasks, along
+    with the aborts that saved and the change in the total time taken
+    compared with the optimistic manager (if it was simulated as well)
+    '''
+    def countAborted(stats):
+        return sum(1 for key in stats.keys()
+            if isinstance(key, int) and stats[key]['aborted'])
+
+    baseline = None
+    for stats in globalStats:
+        if stats['meta']['manager'] == OptimisticPolicy.NAME:
+            baseline = stats
+
+    for stats in globalStats:
+        if 'preemptions' not in stats['meta']:
+            continue
+
+        line = stats['meta']['manager'] + " preempted tasks " + \
+            str(stats['meta']['preemptions']) + " time(s)"
+        if baseline is not None:
+            line += ": %d abort(s) avoided, total taken %+d compared with " \
+                "%s" % (countAborted(baseline) - countAborted(stats),
+                stats['total']['taken'] - baseline['total']['taken'],
+                baseline['meta']['manager'])
+        print(line)
+
+
+def copyRows(globalStats):
+    '''
+    Copies the rows streamed by a worker process to stdout and removes the
+    temporary file they were in
+    '''
+    rowsPath = globalStats[0]['meta']['rowsPath']
+    with open(rowsPath, 'r') as rowsFile:
+        shutil.copyfileobj(rowsFile, sys.stdout)
+    os.remove(rowsPath)
+
 
-    globalStats.append( simulateAlgorithm(ManagerType.OPTIMISTIC) )
-    globalStats.append( simulateAlgorithm(ManagerType.BANKER) )
+def writeProfiles(outPath, filePaths, batchStats):
+    '''
+    Writes the profile of every simulation (one per input file and manager)
+    to a JSON file, as a list of the Profiler's summaries tagged with the
+    input file and the manager
+    '''
+    profiles = []
+    for filePath, globalStats in zip(filePaths, batchStats):
+        for stats in globalStats:
+            profile = dict(stats['meta']['profile'])
+            profile['file'] = filePath
+            profile['manager'] = stats['meta']['manager']
+            profiles.append(profile)
+
+    with open(outPath, 'w') as file:
+        json.dump(profiles, file, indent=2, sort_keys=True)
+
+
+def writeUtilization(outDir, fileFormat, filePaths, managers, batchStats):
+    '''
+    Writes the utilization recorded by every simulation (one per input file
+    and manager) to a file of its own in outDir, named after both, as CSV or
+    as a NumPy archive ("csv" or "npz")
+    '''
+    if not os.path.isdir(outDir):
+        os.makedirs(outDir)
+
+    for filePath, globalStats in zip(filePaths, batchStats):
+        name = os.path.splitext(os.path.basename(filePath))[0]
+        for manager, stats in zip(managers, globalStats):
+            recorder = stats['meta']['utilization']
+            outPath = os.path.join(outDir, name + "-" + manager + "." +
+                fileFormat)
 
-    printReport(globalStats)
+            with open(outPath, 'wb') as file:
+                if fileFormat == "csv":
+                    recorder.writeCSV(file)
+                else:
+                    recorder.writeNumPy(file)
+
+
+if __name__ == "__main__":
+    '''
+    Reads data outlining available resources as well as tasks' instructions
+    and executes the optimistic and Banker's resource managing algorithms (or
+    any others selected out of the registry of policies).
+    Prints stats pertaining to the runtime of each algorithm at the end using
+    the format specified by printReport(globalStats), or in one of the
+    formats of Reporter.py.
+    If several input files are given, they're simulated in parallel and
+    reported one after the other, in the order they were given.
+    '''
+
+    # Read given files and options from the command line
+    parser = argparse.ArgumentParser(
+        description="Simulates the optimistic and Banker's resource managers",
+        epilog="ex.: python2.7 Manager.py input-02.txt")
+    parser.add_argument("filePaths", nargs="+", metavar="filePath",
+        help="input file(s)")
+    parser.add_argument("--tick", action="store_true",
+        help="advance the clock one cycle at a time (reference mode)")
+    parser.add_argument("--processes", type=int, default=None,
+        help="number of worker processes for several input files "
+             "(default: one per core)")
+    parser.add_argument("--cache", metavar="DIR", default=None,
+        help="compile inputs into binary traces kept in this directory and "
+             "memory-map them on later runs")
+    parser.add_argument("--safety-stats", action="store_true",
+        help="print how many Banker's safety checks hit the cache")
+    parser.add_argument("--managers", type=parseManagers, default=None,
+        help="comma-separated managers to simulate and compare, out of " +
+             ", ".join(POLICIES.keys()) + " (default: optimistic,banker)")
+    parser.add_argument("--format", default="table",
+        choices=["table", "csv", "jsonl", "summary"],
+        help="report as the assignment's table (default), per-task rows "
+             "streamed as CSV or JSON Lines as tasks finish, or a JSON "
+             "summary of each manager with waiting percentiles")
+    parser.add_argument("--profile", metavar="FILE", default=None,
+        help="write call counts and times of each simulation phase to this "
+             "JSON file")
+    parser.add_argument("--utilization", metavar="DIR", default=None,
+        help="record the units available and busy and the tasks waiting for "
+             "each resource in every cycle, and write them to this directory "
+             "(a file per input file and manager)")
+    parser.add_argument("--utilization-format", default="csv",
+        choices=["csv", "npz"], help="write the utilization as CSV (default) "
+        "or as NumPy archives")
+    parser.add_argument("--trace", metavar="DIR", default=None,
+        help="write the timeline of every task (requests, grants, waits, "
+             "releases, preemptions, aborts, safety checks) to this "
+             "directory in the Chrome trace-event format (a file per input "
+             "file and manager)")
+    args = parser.parse_args()
+
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+    profile = args.profile is not None
+    utilization = args.utilization is not None
+    # Selecting managers also prints a comparison of their totals
+    managers = args.managers or DEFAULT_MANAGERS
+    compare = args.managers is not None
+
+    for filePath in args.filePaths:
+        if not os.path.isfile(filePath):
+            print("\nCan't find: '" + filePath + "'.\n"); exit(0)
+
+    if args.trace is not None and not os.path.isdir(args.trace):
+        os.makedirs(args.trace)
+
+    # Per-task rows are preceded by a header (for the formats that have one)
+    if args.format in ROW_WRITERS:
+        ROW_WRITERS[args.format](sys.stdout).writeHeader()
+
+    if len(args.filePaths) == 1:
+        # Run for each manager (OPTIMISTIC and BANKER by default), and
+        # assemble stats
+        program = loadInputFile(args.filePaths[0], args.cache)
+
+        globalStats = simulateProgram(program, args.filePaths[0], managers,
+            clockMode, profile, args.format, sys.stdout, utilization,
+            args.trace)
+        batchStats = [globalStats]
+
+        if args.format == "table":
+            printMessages(globalStats)
+            printReport(globalStats)
+            if compare: printComparison(globalStats)
+            printPreemptions(globalStats)
+            if args.safety_stats: printSafetyChecks(globalStats)
+
+    else:
+        batchStats = simulateBatch(args.filePaths, clockMode, args.processes,
+            args.cache, profile, args.format, managers, utilization,
+            args.trace)
+
+        for filePath, globalStats in zip(args.filePaths, batchStats):
+            if args.format == "table":
+                print("CURRENTLY TESTING " + os.path.basename(filePath))
+                printMessages(globalStats)
+                printReport(globalStats)
+                if compare: printComparison(globalStats)
+                printPreemptions(globalStats)
+                if args.safety_stats: printSafetyChecks(globalStats)
+                print("-" * 30)
+
+            elif args.format in ROW_WRITERS:
+                copyRows(globalStats)
+
+    if args.format == "summary":
+        print(renderSummaries([stats['meta']['summary']
+            for globalStats in batchStats for stats in globalStats]))
+
+    if profile:
+        writeProfiles(args.profile, args.filePaths, batchStats)
+    if utilization:
+        writeUtilization(args.utilization, args.utilization_format,
+            args.filePaths, managers, batchStats)
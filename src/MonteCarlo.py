@@ -0,0 +1,211 @@
+#!/usr/bin/python2.7
+
+import os
+import sys
+import json
+import math
+import random
+import argparse
+import multiprocessing
+
+from Simulation import ClockMode
+from Policies import POLICIES
+from Reporter import TaskReporter
+from Generator import DelayDistribution, drawDelay
+from Manager import (loadInputFile, simulateAlgorithm, parseManagers,
+    DEFAULT_MANAGERS)
+
+
+# Totals reported for each manager
+METRICS = ("taken", "waiting", "aborted")
+
+# Critical values of Student's t distribution for two-sided 95% confidence
+# intervals, by degrees of freedom (1 to 30)
+T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+# Program being replicated (loaded once by each worker process, see
+# initWorker)
+replicatedProgram = None
+
+
+def initWorker(filePath, cacheDir):
+    '''
+    Loads the replicated input file once per worker process
+    '''
+    global replicatedProgram
+    replicatedProgram = loadInputFile(filePath, cacheDir)
+
+
+def replicationSeed(seed, index):
+    '''
+    Returns the seed of a replication, which only depends on the seed of the
+    experiment and the replication's index
+    '''
+    return (seed << 32) + index
+
+
+def simulateReplication(job):
+    '''
+    Unpacks an (index, seed, delay distribution, jitter, managers, clock
+    mode) job, draws every instruction's delay from the distribution (with
+    the input's delay plus the jitter as the mean) and simulates each manager
+    over the same draws.
+    Returns the index along with a dict mapping each manager to its total
+    time taken and waiting and its number of aborted tasks.
+    '''
+    index, seed, distribution, jitter, managers, clockMode = job
+    rand = random.Random(replicationSeed(seed, index))
+    program = replicatedProgram.withDelays(
+        lambda delay: drawDelay(rand, delay + jitter, distribution))
+
+    results = {}
+    for manager in managers:
+        reporter = TaskReporter(POLICIES[manager].NAME, None)
+        simulateAlgorithm(program, manager, clockMode, reporter=reporter)
+        summary = reporter.summary
+        results[manager] = {'taken':summary.taken,
+            'waiting':summary.waiting, 'aborted':summary.numAborted}
+
+    return index, results
+
+
+def tCritical(df):
+    '''
+    Returns the critical value of Student's t distribution with df degrees
+    of freedom for a two-sided 95% confidence interval (past the table, from
+    the Cornish-Fisher expansion around the normal distribution's)
+    '''
+    if df <= len(T95):
+        return T95[df - 1]
+
+    z = 1.959964
+    return z + (z**3 + z) / (4.0 * df) + \
+        (5 * z**5 + 16 * z**3 + 3 * z) / (96.0 * df**2)
+
+
+def confidenceInterval(values):
+    '''
+    Returns a dict with the mean of the values, their sample standard
+    deviation and the bounds of the 95% confidence interval of the mean
+    (both the mean itself if there's a single value)
+    '''
+    n = len(values)
+    mean = float(sum(values)) / n
+    if n < 2:
+        return {'mean':mean, 'stdev':0.0, 'low':mean, 'high':mean}
+
+    stdev = math.sqrt(sum((x - mean)**2 for x in values) / (n - 1))
+    halfWidth = tCritical(n - 1) * stdev / math.sqrt(n)
+    return {'mean':mean, 'stdev':stdev, 'low':mean - halfWidth,
+        'high':mean + halfWidth}
+
+
+def replicate(filePath, numReplications, seed=0,
+              distribution=DelayDistribution.EXPONENTIAL, jitter=0,
+              managers=DEFAULT_MANAGERS, clockMode=ClockMode.EVENT,
+              numProcesses=None, cacheDir=None):
+    '''
+    Runs numReplications replications of the input file (see
+    simulateReplication) across a pool of worker processes. Returns a dict
+    mapping each manager to the confidence interval (see
+    confidenceInterval) of each of its totals. The outcome only depends on
+    the seed, not on the number of processes.
+    '''
+    jobs = [(index, seed, distribution, jitter, managers, clockMode)
+        for index in range(numReplications)]
+
+    pool = multiprocessing.Pool(numProcesses, initWorker, (filePath, cacheDir))
+    try:
+        replications = sorted(pool.imap_unordered(simulateReplication, jobs))
+    finally:
+        pool.terminate()
+
+    return {manager:{metric:confidenceInterval([results[manager][metric]
+        for _, results in replications]) for metric in METRICS}
+        for manager in managers}
+
+
+def renderIntervals(intervals, managers):
+    '''
+    Renders a line per manager and total with its mean, the bounds of its
+    95% confidence interval and its standard deviation
+    '''
+    lines = ["%-14s%-10s%12s%12s%12s%12s" % ("", "", "mean", "95% low",
+        "95% high", "stdev")]
+
+    for manager in managers:
+        for metric in METRICS:
+            interval = intervals[manager][metric]
+            lines.append("%-14s%-10s%12.2f%12.2f%12.2f%12.2f" % (
+                POLICIES[manager].NAME, metric, interval['mean'],
+                interval['low'], interval['high'], interval['stdev']))
+
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    '''
+    Replicates the simulation of an input file with random instruction
+    delays and prints the mean and 95% confidence interval of each
+    manager's totals
+    '''
+    parser = argparse.ArgumentParser(
+        description="Replicates simulations with random instruction delays",
+        epilog="ex.: python2.7 MonteCarlo.py --replications 100 --seed 7 "
+               "--delay-distribution uniform --jitter 1 input-05.txt")
+    parser.add_argument("filePath", help="input file")
+    parser.add_argument("--replications", type=int, default=30,
+        help="number of replications (default: 30)")
+    parser.add_argument("--seed", type=int, default=0,
+        help="seed the replications' delays are drawn from (default: 0)")
+    parser.add_argument("--delay-distribution",
+        default=DelayDistribution.EXPONENTIAL, choices=DelayDistribution.ALL,
+        help="distribution of each delay, whose mean is the input's delay "
+             "plus the jitter (default: exponential)")
+    parser.add_argument("--jitter", type=float, default=0,
+        help="mean delay added to every instruction's, so that the "
+             "instructions without a delay vary as well (default: 0)")
+    parser.add_argument("--managers", type=parseManagers,
+        default=DEFAULT_MANAGERS,
+        help="comma-separated managers to simulate (default: "
+             "optimistic,banker)")
+    parser.add_argument("--processes", type=int, default=None,
+        help="number of worker processes (default: one per core)")
+    parser.add_argument("--cache", metavar="DIR", default=None,
+        help="directory of binary traces (see Manager.py)")
+    parser.add_argument("--tick", action="store_true",
+        help="advance the clock one cycle at a time")
+    parser.add_argument("--json", action="store_true",
+        help="print the intervals as JSON")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.filePath):
+        print("\nCan't find: '" + args.filePath + "'.\n"); exit(0)
+    if args.replications < 1:
+        parser.error("at least one replication is needed")
+    if args.jitter < 0:
+        parser.error("the jitter can't be negative")
+
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+    intervals = replicate(args.filePath, args.replications, args.seed,
+        args.delay_distribution, args.jitter, args.managers, clockMode,
+        args.processes, args.cache)
+
+    if not args.jitter and all(interval['stdev'] == 0
+            for metrics in intervals.values()
+            for interval in metrics.values()):
+        sys.stderr.write("Every replication was identical (the input's "
+            "delays may all be 0); pass --jitter to vary them.\n")
+
+    if args.json:
+        json.dump({'file':args.filePath, 'replications':args.replications,
+            'seed':args.seed, 'delayDistribution':args.delay_distribution,
+            'jitter':args.jitter,
+            'managers':{POLICIES[manager].NAME:intervals[manager]
+                for manager in args.managers}}, sys.stdout, indent=2,
+            sort_keys=True)
+        print("")
+    else:
+        sys.stdout.write(renderIntervals(intervals, args.managers))
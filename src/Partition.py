@@ -0,0 +1,306 @@
+#!/usr/bin/python2.7
+
+import os
+import timeit
+import argparse
+import multiprocessing
+
+from Simulation import Simulation, ClockMode
+from Policies import POLICIES, BankerPolicy, PreemptivePolicy
+from Manager import (loadInputFile, simulateAlgorithm, assembleTaskStats,
+    addTotals, parseManagers, printMessages, printReport, DEFAULT_MANAGERS)
+
+
+# Program whose components are simulated (loaded once by each worker
+# process, see initWorker)
+partitionedProgram = None
+
+
+def initWorker(filePath, cacheDir):
+    '''
+    Loads the partitioned input file once per worker process
+    '''
+    global partitionedProgram
+    partitionedProgram = loadInputFile(filePath, cacheDir)
+
+
+class MessageLog(list):
+    '''
+    Messages of a simulation, which notes the cycle each one is issued in so
+    that the messages of several simulations can be merged in order
+    '''
+
+    def __init__(self, simulation):
+        list.__init__(self)
+        self.simulation = simulation
+        self.cycles = []
+
+    def append(self, msg):
+        self.cycles.append(self.simulation.sysClock)
+        list.append(self, msg)
+
+
+def simulateComponent(job):
+    '''
+    Unpacks an (index, task IDs, manager, clock mode) job and simulates the
+    manager over the component made of those tasks alone (see
+    Program.withTasks). Returns the index along with a dict of:
+        stats: dict mapping the tasks' IDs to their stats
+        messages: (cycle, message) pairs of the messages that were issued
+        cycles: cycle the run ended at
+        deadlockCycle: cycle the first deadlock was resolved in (if any)
+        safeChecks: dict mapping cycles to the highest ID of the tasks
+            that weren't waiting and whose requests the Banker's safety
+            checks found safe in them
+        unsafeReleases: dict mapping cycles to the lowest ID of the tasks
+            whose releases or retirements (e.g. aborts for exceeding their
+            claims) left the state unsafe in them, until the units they
+            freed were available (see isSeparable)
+        counts: rest of the meta to add up (safety checks, preemptions)
+    '''
+    index, taskIDs, manager, clockMode = job
+    simulation = Simulation(partitionedProgram.withTasks(taskIDs), manager,
+        clockMode)
+    simulation.messages = MessageLog(simulation)
+    safeChecks = {}
+    unsafeReleases = {}
+
+    if issubclass(POLICIES[manager], BankerPolicy):
+        safety = simulation.safety
+        isSafe = safety.isSafe
+        standardRelease = simulation.standardRelease
+        retireTask = simulation.retireTask
+
+        def noteSafetyCheck(taskID, resourceID, numUnits):
+            safe = isSafe(taskID, resourceID, numUnits)
+            if safe and not simulation.tasks[taskID].isWaiting():
+                safeChecks[simulation.sysClock] = taskID
+            return safe
+
+        def noteUnsafeState(task):
+            if simulation.sysClock not in unsafeReleases and \
+               not safety.isStateSafe():
+                unsafeReleases[simulation.sysClock] = task.id
+
+        def noteRelease(task, instruction):
+            standardRelease(task, instruction)
+            noteUnsafeState(task)
+
+        def noteRetirement(task):
+            retireTask(task)
+            noteUnsafeState(task)
+
+        safety.isSafe = noteSafetyCheck
+        simulation.standardRelease = noteRelease
+        simulation.retireTask = noteRetirement
+
+    tasks = simulation.simulate()
+
+    return index, {'stats':assembleTaskStats(tasks),
+        'messages':zip(simulation.messages.cycles, simulation.messages),
+        'cycles':simulation.sysClock,
+        'deadlockCycle':simulation.deadlockCycle,
+        'safeChecks':safeChecks, 'unsafeReleases':unsafeReleases,
+        'counts':{'cached':simulation.safety.hits,
+            'computed':simulation.safety.misses,
+            'skipped':simulation.safety.skips,
+            'preemptions':sum(task.numPreemptions
+                for task in tasks.itervalues())}}
+
+
+def isSeparable(results):
+    '''
+    True if the simulations of the components (see simulateComponent) ran
+    as the simulation of the whole program would have, false otherwise.
+    Components don't share resources, but two kinds of decisions depend on
+    every task:
+        - deadlocks, in which all tasks are waiting: only a single
+          component may resolve any, once all of the others are done
+        - the Banker's safety checks, since the units a release or an
+          abort frees only become available in the next cycle: the state
+          of the whole is safe if every component's is, so no component's
+          check may have found a request safe after another's release or
+          retirement (which happen in order of task ID) left it unsafe in
+          the same cycle. Checks that found requests unsafe, or were made
+          for waiting tasks (which are retried before any release), would
+          have gone the same way.
+    '''
+    deadlocked = [result for _, result in results
+        if result['deadlockCycle'] is not None]
+    if len(deadlocked) > 1 or (deadlocked and
+       any(result['cycles'] >= deadlocked[0]['deadlockCycle']
+           for _, result in results if result is not deadlocked[0])):
+        return False
+
+    for _, result in results:
+        for _, other in results:
+            if other is not result and any(
+               cycle in other['unsafeReleases'] and
+               other['unsafeReleases'][cycle] < taskID
+               for cycle, taskID in result['safeChecks'].iteritems()):
+                return False
+
+    return True
+
+
+def mergeComponents(results, manager):
+    '''
+    Merges the results of a manager's simulations of every component (see
+    simulateComponent), in order of their indices, into the stats of the
+    whole program (see Manager.assembleStats). The messages are put in
+    order of the cycle they were issued in; those of the same cycle go in
+    order of component.
+    '''
+    stats = {}
+    messages = []
+    cycles = 0
+    counts = dict.fromkeys(("cached", "computed", "skipped", "preemptions"),
+        0)
+    for index, result in results:
+        stats.update(result['stats'])
+        messages.extend((cycle, index, position, msg)
+            for position, (cycle, msg) in enumerate(result['messages']))
+        cycles = max(cycles, result['cycles'])
+        for key, count in result['counts'].iteritems():
+            counts[key] += count
+
+    stats = addTotals(stats, manager)
+    stats['meta']['messages'] = [msg for _, _, _, msg in sorted(messages)]
+    stats['meta']['cycles'] = cycles
+    stats['meta']['safetyChecks'] = {key:counts[key]
+        for key in ("cached", "computed", "skipped")}
+    if issubclass(POLICIES[manager], PreemptivePolicy):
+        stats['meta']['preemptions'] = counts['preemptions']
+
+    return stats
+
+
+def simulatePartitioned(filePath, managers=DEFAULT_MANAGERS,
+                        clockMode=ClockMode.EVENT, numProcesses=None,
+                        cacheDir=None):
+    '''
+    Splits the input file's tasks into groups that never deal with the same
+    resources (see Program.getComponents) and simulates each manager over
+    every group on its own, across a pool of worker processes (the largest
+    groups first). Returns the groups along with the list of each manager's
+    stats, which are the same as those of a simulation of the whole program.
+
+    A manager for which the groups' simulations can't be merged, because
+    some of their decisions depended on the other groups (see isSeparable),
+    is simulated over the whole program instead, and its meta marked as
+    'partitioned':False.
+    '''
+    program = loadInputFile(filePath, cacheDir)
+    components = program.getComponents()
+
+    pool = None
+    if len(components) > 1: # (otherwise there's nothing to split)
+        numProcesses = numProcesses or multiprocessing.cpu_count()
+        pool = multiprocessing.Pool(numProcesses, initWorker,
+            (filePath, cacheDir))
+
+    # Largest components first, so that none is left to run on its own
+    order = sorted(range(len(components)),
+        key=lambda x: -sum(len(program.tables[taskID].commands)
+            for taskID in components[x]))
+
+    try:
+        globalStats = []
+        for manager in managers:
+            stats = None
+            if pool is not None:
+                jobs = [(index, components[index], manager, clockMode)
+                    for index in order]
+                results = sorted(pool.imap_unordered(simulateComponent, jobs,
+                    max(1, len(jobs) // (4 * numProcesses))))
+                if isSeparable(results):
+                    stats = mergeComponents(results, manager)
+                    stats['meta']['partitioned'] = True
+
+            if stats is None:
+                stats = simulateAlgorithm(program, manager, clockMode)
+                stats['meta']['partitioned'] = False
+            globalStats.append(stats)
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    return components, globalStats
+
+
+def sameStats(stats, other):
+    '''
+    True if two runs of a manager yielded the same stats for every task, the
+    same totals and cycles and the same messages, false otherwise
+    '''
+    keys = [key for key in stats.keys() if key != 'meta']
+    return sorted(keys) == sorted(key for key in other.keys()
+            if key != 'meta') and \
+        all(stats[key] == other[key] for key in keys) and \
+        stats['meta']['cycles'] == other['meta']['cycles'] and \
+        sorted(stats['meta']['messages']) == \
+            sorted(other['meta']['messages'])
+
+
+if __name__ == "__main__":
+    '''
+    Simulates the independent parts of an input file in parallel and prints
+    the stats of the whole
+    '''
+    parser = argparse.ArgumentParser(
+        description="Simulates groups of tasks that share no resources in "
+                    "parallel",
+        epilog="ex.: python2.7 Partition.py --processes 4 --compare "
+               "input-02.txt")
+    parser.add_argument("filePath", help="input file")
+    parser.add_argument("--managers", type=parseManagers,
+        default=DEFAULT_MANAGERS,
+        help="comma-separated managers to simulate (default: "
+             "optimistic,banker)")
+    parser.add_argument("--processes", type=int, default=None,
+        help="number of worker processes (default: one per core)")
+    parser.add_argument("--cache", metavar="DIR", default=None,
+        help="directory of binary traces (see Manager.py)")
+    parser.add_argument("--tick", action="store_true",
+        help="advance the clock one cycle at a time")
+    parser.add_argument("--compare", action="store_true",
+        help="also simulate the whole input at once, check that the stats "
+             "match and print both wall times")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.filePath):
+        print("\nCan't find: '" + args.filePath + "'.\n"); exit(0)
+
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+    start = timeit.default_timer()
+    components, globalStats = simulatePartitioned(args.filePath,
+        args.managers, clockMode, args.processes, args.cache)
+    partitionedTime = timeit.default_timer() - start
+
+    printMessages(globalStats)
+    printReport(globalStats)
+
+    print(str(len(components)) + " group(s) of tasks that share no "
+        "resources (largest: " + str(max(len(x) for x in components)) +
+        " task(s))")
+    for stats in globalStats:
+        if len(components) > 1 and not stats['meta']['partitioned']:
+            print(stats['meta']['manager'] + " couldn't be split (see "
+                "isSeparable), so it was simulated over the whole input")
+
+    if args.compare:
+        start = timeit.default_timer()
+        program = loadInputFile(args.filePath, args.cache)
+        wholeStats = [simulateAlgorithm(program, manager, clockMode)
+            for manager in args.managers]
+        wholeTime = timeit.default_timer() - start
+
+        mismatches = [stats['meta']['manager']
+            for stats, whole in zip(globalStats, wholeStats)
+            if not sameStats(stats, whole)]
+        print("partitioned: %.3fs, whole: %.3fs (%.2fx), %s" % (
+            partitionedTime, wholeTime, wholeTime / partitionedTime,
+            "stats differ for " + ", ".join(mismatches) if mismatches
+            else "same stats"))
+        if mismatches:
+            exit(1)
@@ -0,0 +1,268 @@
+from collections import OrderedDict
+
+
+class Policy:
+    '''
+    Decides how a simulation handles its tasks' claims, requests and
+    releases, in which order it retries the waiting tasks and what it does at
+    the end of every cycle. The mechanisms (granting units, safety checks,
+    aborting deadlocked tasks, ...) belong to the Simulation, which calls
+    these hooks and is what the policy acts on.
+    '''
+
+    NAME = None # Shown in the reports
+    # True if a refused request may be granted once units of any resource are
+    # freed or tasks are retired, rather than only once units of the
+    # resource it's for are freed (see Simulation.wakeWaiting())
+    WAKES_ALL = False
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+
+    def processClaim(self, task, instruction):
+        '''
+        Handles an 'initiate' instruction (claims are ignored by default)
+        '''
+        pass
+
+    def request(self, task, instruction):
+        '''
+        Handles a 'request' instruction: grants the units if they're available
+        and tells the task to wait otherwise
+        '''
+        self.simulation.standardRequest(task, instruction)
+
+    def release(self, task, instruction):
+        '''
+        Handles a 'release' instruction
+        '''
+        self.simulation.standardRelease(task, instruction)
+
+    def orderWaiting(self, tasks):
+        '''
+        Returns the waiting tasks (given in the order they were told to wait)
+        in the order they should be retried
+        '''
+        return tasks
+
+    def endCycle(self):
+        '''
+        Called once all tasks were processed in a cycle. Returns true if it
+        changed the state of the simulation, false otherwise.
+        '''
+        return False
+
+
+class OptimisticPolicy(Policy):
+    '''
+    Grants any request that can be satisfied and, once all tasks are waiting,
+    aborts tasks until the deadlock is gone
+    '''
+
+    NAME = "OPTIMISTIC"
+
+    def endCycle(self):
+        '''
+        Resolves the deadlock if there's one
+        '''
+        if self.simulation.isDeadlocked():
+            self.simulation.resolveDeadlock()
+            return True
+
+        return False
+
+
+class BankerPolicy(Policy):
+    '''
+    Dijkstra's Banker's algorithm: checks the claims before the run begins
+    and only grants requests that leave the system in a safe state
+    '''
+
+    NAME = "BANKER'S"
+    WAKES_ALL = True # Safety depends on every task's claims and allocations
+
+    def processClaim(self, task, instruction):
+        self.simulation.bankerProcessClaims(task, instruction)
+
+    def request(self, task, instruction):
+        self.simulation.bankerRequest(task, instruction)
+
+
+class ShortestNeedFirstPolicy(OptimisticPolicy):
+    '''
+    Optimistic policy that retries the waiting tasks in order of their
+    remaining need (claims - held units, over all resources), so that the
+    tasks closest to being done get units first
+    '''
+
+    NAME = "SRNF"
+
+    def processClaim(self, task, instruction):
+        task.setClaims(instruction.resourceType, instruction.numUnits)
+
+    def orderWaiting(self, tasks):
+        '''
+        Sorts the waiting tasks by remaining need (ties stay in the order
+        they were told to wait)
+        '''
+        return sorted(tasks, key=lambda t: sum(t.getMaxAddl().values()))
+
+
+class PriorityAgingPolicy(OptimisticPolicy):
+    '''
+    Optimistic policy that retries the waiting tasks in order of priority.
+    Lower task IDs have higher priorities, and every AGING cycles spent
+    waiting raise a task's priority by one ID so that it can't starve.
+    '''
+
+    NAME = "PRIORITY"
+
+    # Cycles of waiting that make up for one ID of priority
+    AGING = 1
+
+    def orderWaiting(self, tasks):
+        '''
+        Sorts the waiting tasks by aged priority (ties stay in the order they
+        were told to wait)
+        '''
+        cycle = self.simulation.getWaitClock()
+        return sorted(tasks,
+            key=lambda t: t.id - t.getWaitingTime(cycle) / float(self.AGING))
+
+
+class StrictFIFOPolicy(OptimisticPolicy):
+    '''
+    Optimistic policy in which no request overtakes an earlier one for the
+    same resource: while a request for it is waiting, every later request for
+    that resource waits as well (even if there are enough units)
+    '''
+
+    NAME = "FIFO-STRICT"
+
+    def request(self, task, instruction):
+        '''
+        Grants the request if no earlier one for the resource is waiting
+        '''
+        if not self.simulation.isFirstInLine(task, instruction.resourceType):
+            self.simulation.waitTask(task, instruction)
+            return
+
+        self.simulation.standardRequest(task, instruction)
+
+
+class PreemptivePolicy(OptimisticPolicy):
+    '''
+    Optimistic policy that recovers from deadlock by preempting tasks rather
+    than aborting them: the blocked tasks that cost the least to preempt
+    (see estimateCost()) give all of their units back and are rolled back
+    to where they held nothing, as few of them as it takes to satisfy
+    another's request. Every preemption thus lets another task carry on,
+    and a task is preempted at most MAX_PREEMPTIONS times. If that can't
+    be done, tasks are aborted as the optimistic policy does. Subclasses
+    plug in other cost estimates.
+    '''
+
+    NAME = "PREEMPTIVE"
+
+    # Times a task can be preempted (so that no set of tasks keeps
+    # preempting one another)
+    MAX_PREEMPTIONS = 3
+
+    def endCycle(self):
+        '''
+        Resolves the deadlock if there's one, by preempting tasks if
+        possible (none are if the units freed in this cycle already satisfy
+        a request, which is then granted in the next one)
+        '''
+        if not self.simulation.isDeadlocked():
+            return False
+
+        blocked = self.simulation.getBlockedTasks()
+        free = self.simulation.getFreeUnits()
+        if any(self.fits(task, free) for task in blocked):
+            return False
+
+        victims = self.chooseVictims(blocked, free)
+        if victims:
+            self.simulation.preemptDeadlock(victims)
+        else:
+            self.simulation.resolveDeadlock()
+
+        return True
+
+    def chooseVictims(self, blocked, free):
+        '''
+        Returns the blocked tasks to preempt: the cheapest ones (the lowest
+        ID breaks ties in cost) whose units, along with the free units,
+        satisfy the request of another blocked task. Returns an empty list
+        if there are no such tasks.
+        '''
+        candidates = sorted((task for task in blocked
+            if task.numPreemptions < self.MAX_PREEMPTIONS and
+            any(units > 0 for units in task.heldResources.values())),
+            key=lambda t: (self.estimateCost(t), t.id))
+
+        units = dict(free)
+        victims = []
+        for task in candidates:
+            victims.append(task)
+            for rID, numUnits in task.heldResources.iteritems():
+                units[rID] += max(numUnits, 0)
+
+            if any(self.fits(other, units) for other in blocked
+                   if other not in victims):
+                return victims
+
+        return []
+
+    def fits(self, task, units):
+        '''
+        True if the request of a blocked task can be satisfied with the
+        given units (a dict mapping resource IDs to them), false otherwise
+        '''
+        ins = task.getCurrentInstruction()
+        return ins.command == "request" and \
+            ins.numUnits <= units[ins.resourceType]
+
+    def estimateCost(self, task):
+        '''
+        Cost of preempting a task: the units it holds (which have to be
+        granted to it all over again)
+        '''
+        return sum(task.heldResources.values())
+
+
+class ProgressPreemptivePolicy(PreemptivePolicy):
+    '''
+    Preemptive policy that preempts the task that loses the least progress
+    '''
+
+    NAME = "PREEMPT-PROG"
+
+    def estimateCost(self, task):
+        '''
+        Cost of preempting a task: the instructions it completed since its
+        rollback point (which it has to carry out again)
+        '''
+        return task.currInstruction - task.rollbackPoint
+
+
+# Maps the names policies are selected by to their classes, in order
+POLICIES = OrderedDict()
+
+
+def registerPolicy(key, policy):
+    '''
+    Makes a Policy subclass selectable by the given key
+    '''
+    POLICIES[key] = policy
+
+
+registerPolicy("optimistic", OptimisticPolicy)
+registerPolicy("banker", BankerPolicy)
+registerPolicy("srnf", ShortestNeedFirstPolicy)
+registerPolicy("priority", PriorityAgingPolicy)
+registerPolicy("fifo-strict", StrictFIFOPolicy)
+registerPolicy("preemptive", PreemptivePolicy)
+registerPolicy("preemptive-progress", ProgressPreemptivePolicy)
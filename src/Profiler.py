@@ -0,0 +1,76 @@
+import timeit
+
+
+class Profiler:
+    '''
+    Counts the calls to, and the cumulative time spent in, each phase of a
+    simulation. Phases are methods of the Simulation (or of its
+    SafetyEngine) that get wrapped on that one instance when it's
+    instrumented, so simulations that aren't profiled run the very same code
+    as before. Note that the times are inclusive (e.g. bankerRequest includes
+    isSafe, which includes checkSafety).
+    '''
+
+    # Instrumented methods of the simulation and of its safety engine
+    SIMULATION_PHASES = ("simulate", "execute", "standardRequest",
+        "bankerRequest", "bankerProcessClaims", "isSafe", "resolveDeadlock",
+        "cleanFreeBuffer", "endCycle")
+    SAFETY_PHASES = ("checkSafety",)
+
+    def __init__(self):
+        self.calls = {} # Maps phases to number of calls
+        self.times = {} # Maps phases to cumulative seconds
+        self.simulation = None
+
+
+    def instrument(self, simulation):
+        '''
+        Wraps the phases of a simulation so that they report to the profiler
+        '''
+        self.simulation = simulation
+
+        for phase in self.SIMULATION_PHASES:
+            self.wrap(simulation, phase)
+        for phase in self.SAFETY_PHASES:
+            self.wrap(simulation.safety, phase)
+
+    def wrap(self, obj, phase):
+        '''
+        Replaces a bound method of the object with one that's counted and
+        timed under the name of the phase
+        '''
+        method = getattr(obj, phase)
+        calls, times = self.calls, self.times
+        calls[phase] = 0
+        times[phase] = 0.0
+        timer = timeit.default_timer
+
+        def timed(*args, **kwargs):
+            start = timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[phase] += timer() - start
+                calls[phase] += 1
+
+        setattr(obj, phase, timed)
+
+
+    def summary(self):
+        '''
+        Returns a dict (ready to be written as JSON) with the number of cycles
+        simulated, how many of them were processed rather than skipped by the
+        event-driven clock, the tasks executed per processed cycle and the
+        calls and seconds of each phase
+        '''
+        cyclesProcessed = self.calls.get("endCycle", 0)
+        tasksTouched = self.calls.get("execute", 0)
+
+        return {
+            'cycles':self.simulation.sysClock,
+            'cyclesProcessed':cyclesProcessed,
+            'tasksTouched':tasksTouched,
+            'tasksPerCycle':float(tasksTouched) / max(cyclesProcessed, 1),
+            'phases':{phase:{'calls':self.calls[phase],
+                'seconds':self.times[phase]} for phase in self.calls}
+        }
@@ -0,0 +1,116 @@
+from array import array
+
+import numpy
+
+from InstructionTable import InstructionTable, CommandType
+
+
+class Program:
+    '''
+    Compiled form of an input: its outline and every task's instructions.
+    A program is treated as read-only once compiled, so it can be simulated
+    any number of times (each run only keeps per-task cursors and remaining
+    delays). Note that the instructions may be streamed into it, or come
+    already split into tables (e.g. from a memory-mapped trace).
+    '''
+
+    def __init__(self, outline, instructions, tables=None):
+        self.numTasks = outline[0]
+        self.numResources = outline[1]
+        # Number of units of each resource (in order of resource ID)
+        self.units = tuple(outline[2:2 + self.numResources])
+
+        # Maps task IDs to their InstructionTable
+        if tables is None:
+            tables = {x:InstructionTable(x)
+                for x in range(1, self.numTasks + 1)}
+        self.tables = tables
+
+        for command, taskID, delay, resourceType, numUnits in instructions:
+            self.tables[taskID].append(command, delay, resourceType, numUnits)
+
+
+    @property
+    def outline(self):
+        '''
+        Gets the outline the program was compiled from
+        '''
+        return [self.numTasks, self.numResources] + list(self.units)
+
+    def withUnits(self, units):
+        '''
+        Returns the same program with other numbers of units of each resource
+        (the instructions are shared, not copied)
+        '''
+        return Program([self.numTasks, self.numResources] + list(units), (),
+            self.tables)
+
+    def withDelays(self, draw):
+        '''
+        Returns the same program with the delay of every instruction replaced
+        by draw(delay), drawn task after task in order of task ID (only the
+        delays are copied)
+        '''
+        tables = {}
+        for taskID in sorted(self.tables.keys()):
+            table = self.tables[taskID]
+            delays = array('i', [draw(int(delay)) for delay in table.delays])
+            tables[taskID] = InstructionTable(taskID, (table.commands, delays,
+                table.resourceTypes, table.numUnits))
+
+        return Program(self.outline, (), tables)
+
+    def withTasks(self, taskIDs):
+        '''
+        Returns the part of the program made of the given tasks, which keep
+        their IDs, along with every resource (the instructions are shared,
+        not copied)
+        '''
+        return Program(self.outline, (), {x:self.tables[x] for x in taskIDs})
+
+
+    def getComponents(self):
+        '''
+        Splits the tasks into the connected components of the graph in which
+        tasks are linked to the resources their instructions name, i.e. into
+        groups of tasks that never deal with the same resources. Returns a
+        list of the components' sorted task IDs, in order of their lowest
+        ones (a task that names no resource is a component of its own).
+        '''
+        parents = {} # Union-find forest of resource IDs
+
+        def find(rID):
+            root = rID
+            while parents[root] != root:
+                root = parents[root]
+            while parents[rID] != root: # Compress the path
+                parents[rID], rID = root, parents[rID]
+            return root
+
+        # Resource each task is linked through (if any)
+        links = {}
+        for taskID in sorted(self.tables.keys()):
+            table = self.tables[taskID]
+            commands = numpy.asarray(table.commands)
+            resourceTypes = numpy.unique(numpy.asarray(
+                table.resourceTypes)[commands != CommandType.TERMINATE])
+            if not resourceTypes.size:
+                continue
+
+            roots = set()
+            for rID in resourceTypes.tolist():
+                parents.setdefault(rID, rID)
+                roots.add(find(rID))
+
+            root = roots.pop()
+            for other in roots:
+                parents[other] = root
+            links[taskID] = int(resourceTypes[0])
+
+        components = {}
+        for taskID in sorted(self.tables.keys()):
+            key = ('resource', find(links[taskID])) if taskID in links \
+                else ('task', taskID)
+            components.setdefault(key, []).append(taskID)
+
+        return sorted(components.values())
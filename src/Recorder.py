@@ -0,0 +1,128 @@
+import csv
+
+import numpy
+
+
+class UtilizationRecorder:
+    '''
+    Records, for every cycle of a simulation, the available and busy units of
+    each resource and how many tasks wait for it (as they are once the cycle
+    is over). Samples go into buffers allocated up front: once they're full,
+    every two neighbouring samples are merged into one covering twice as
+    many cycles (their averages), so a run of any length takes the same
+    memory and is always covered from start to end, at a resolution that
+    halves as needed.
+    '''
+
+    # Series recorded for each resource, in the order they're kept
+    SERIES = ("available", "busy", "queued")
+
+    def __init__(self, units, capacity=4096, firstCycle=0):
+        if capacity < 2 or capacity % 2:
+            raise ValueError("The capacity has to be an even number > 1")
+
+        self.units = tuple(units) # Total units of each resource
+        self.capacity = capacity # Samples the buffers hold
+        self.firstCycle = firstCycle # Cycle of the first sample
+
+        # Averages of each series (first axis) over the cycles of each sample
+        # (second axis) for each resource (third axis)
+        self.samples = numpy.zeros((len(self.SERIES), capacity, len(units)))
+        self.numSamples = 0
+        self.stride = 1 # Cycles per sample
+
+        # Sums of the series over the cycles of the sample being filled
+        self.pending = numpy.zeros((len(self.SERIES), len(units)))
+        self.pendingCycles = 0
+
+
+    def record(self, available, busy, queued, numCycles=1):
+        '''
+        Records the units available, units busy and tasks waiting for each
+        resource (in order of resource ID) over the given number of cycles
+        '''
+        values = numpy.array((available, busy, queued), dtype=float)
+
+        # Top up the sample being filled
+        if self.pendingCycles:
+            cycles = min(numCycles, self.stride - self.pendingCycles)
+            self.pending += values * cycles
+            self.pendingCycles += cycles
+            numCycles -= cycles
+
+            if self.pendingCycles == self.stride:
+                self.append(self.pending / self.stride, 1)
+                self.pending[:] = 0
+                self.pendingCycles = 0
+
+        # Whole samples at once (e.g. cycles skipped by the event-driven clock)
+        while numCycles >= self.stride:
+            count = min(numCycles // self.stride,
+                self.capacity - self.numSamples)
+            numCycles -= count * self.stride
+            self.append(values, count)
+
+        if numCycles:
+            self.pending += values * numCycles
+            self.pendingCycles = numCycles
+
+    def append(self, values, count):
+        '''
+        Appends count samples of the same values, and merges the samples in
+        pairs once the buffers are full
+        '''
+        start = self.numSamples
+        self.samples[:, start:start + count] = values[:, numpy.newaxis]
+        self.numSamples += count
+
+        if self.numSamples == self.capacity:
+            self.samples[:, :self.capacity // 2] = \
+                (self.samples[:, 0::2] + self.samples[:, 1::2]) / 2
+            self.numSamples = self.capacity // 2
+            self.stride *= 2
+
+
+    def getSeries(self):
+        '''
+        Returns the cycle each sample starts at, the number of cycles it
+        covers and a dict mapping each series to its samples (rows) for each
+        resource (columns). The last sample may cover fewer cycles.
+        '''
+        numSamples = self.numSamples + (1 if self.pendingCycles else 0)
+        cycles = numpy.full(numSamples, self.stride, dtype=numpy.int64)
+        values = self.samples[:, :self.numSamples]
+
+        if self.pendingCycles:
+            cycles[-1] = self.pendingCycles
+            values = numpy.concatenate((values, (self.pending /
+                self.pendingCycles)[:, numpy.newaxis]), axis=1)
+
+        starts = self.firstCycle + numpy.arange(numSamples) * self.stride
+        return starts, cycles, dict(zip(self.SERIES, values))
+
+
+    def writeCSV(self, file):
+        '''
+        Writes a row per sample: the cycle it starts at, the number of cycles
+        it covers and each series for each resource
+        '''
+        starts, cycles, series = self.getSeries()
+        resourceIDs = range(1, len(self.units) + 1)
+
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["cycle", "cycles"] + [name + "_" + str(rID)
+            for rID in resourceIDs for name in self.SERIES])
+
+        for row in range(len(starts)):
+            writer.writerow([starts[row], cycles[row]] + ["%g" %
+                series[name][row, rID - 1]
+                for rID in resourceIDs for name in self.SERIES])
+
+    def writeNumPy(self, file):
+        '''
+        Writes the samples to a NumPy archive (see getSeries()), along with
+        the total units of each resource
+        '''
+        starts, cycles, series = self.getSeries()
+        numpy.savez_compressed(file, cycle=starts, cycles=cycles,
+            units=numpy.array(self.units), **series)
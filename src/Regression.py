@@ -0,0 +1,289 @@
+#!/usr/bin/python2.7
+
+import os
+import re
+import sys
+import glob
+import json
+import timeit
+import argparse
+import multiprocessing
+
+from Simulation import ClockMode
+from Manager import loadInputFile, simulateAlgorithm, DEFAULT_MANAGERS
+
+
+# Root of the repository (where inputs/, outputs/ and testResults.txt are)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+
+def parseRow(tokens):
+    '''
+    Parses the tokens of a line of a table of stats into a list of (task ID
+    or 'total', (time taken, waiting time, percentage waiting)), one per
+    manager, with None for the stats of aborted tasks. Returns None if the
+    line isn't a row of a table.
+    '''
+    row = []
+    i = 0
+    try:
+        while i < len(tokens):
+            if tokens[i] == "Task":
+                key = int(tokens[i + 1]); i += 2
+            elif tokens[i] == "total":
+                key = "total"; i += 1
+            else:
+                return None
+
+            if tokens[i] == "aborted":
+                row.append((key, None)); i += 1
+            else:
+                taken, waiting, percent = tokens[i:i + 3]
+                if not percent.endswith("%"):
+                    return None
+                row.append((key, (int(taken), int(waiting),
+                    int(percent[:-1]))))
+                i += 3
+
+    except (IndexError, ValueError):
+        return None
+
+    return row or None
+
+
+def parseTables(lines):
+    '''
+    Parses the table of stats printed for an input (in the layout of either
+    outputs/ or testResults.txt) into a list with a dict per manager, in
+    order, mapping task IDs and 'total' to their stats (see parseRow)
+    '''
+    columns = []
+    for line in lines:
+        row = parseRow(line.split())
+        if row is None:
+            continue
+
+        while len(columns) < len(row):
+            columns.append({})
+        for column, (key, stats) in zip(columns, row):
+            column[key] = stats
+
+    return columns
+
+
+def readOutputs(outputsDir):
+    '''
+    Returns a dict mapping the names of input files to the tables of their
+    expected outputs (outputs/output-02.txt belongs to input-02.txt)
+    '''
+    expected = {}
+    for outputPath in glob.glob(os.path.join(outputsDir, "output-*.txt")):
+        name = os.path.basename(outputPath).replace("output-", "input-", 1)
+        with open(outputPath, 'r') as file:
+            expected[name] = parseTables(file.read().splitlines())
+
+    return expected
+
+
+def readResults(resultsPath):
+    '''
+    Returns a dict mapping the names of input files to their tables in a
+    record of tester.sh's output (such as testResults.txt), where each one
+    follows a "CURRENTLY TESTING <name>" line
+    '''
+    sections = {}
+    name = None
+    with open(resultsPath, 'r') as file:
+        for line in file.read().splitlines():
+            match = re.search(r"CURRENTLY TESTING (\S+)", line)
+            if match:
+                name = match.group(1)
+                sections[name] = []
+            elif name is not None:
+                sections[name].append(line)
+
+    return {name:parseTables(lines) for name, lines in sections.iteritems()}
+
+
+def tabulate(stats):
+    '''
+    Turns the stats of a simulation (see Manager.assembleStats) into a
+    column of a table (see parseTables)
+    '''
+    column = {}
+    for key, ind in stats.iteritems():
+        if key == 'meta':
+            continue
+        column[key] = None if ind['aborted'] else (ind['taken'],
+            ind['waiting'], ind['percentWaiting'])
+
+    return column
+
+
+def runInput(job):
+    '''
+    Unpacks a (file path, managers, clock mode, repetitions) job, then loads
+    and simulates the input with each manager as many times as asked.
+    Returns the file path, the table of stats and the shortest wall time of
+    a repetition.
+    '''
+    filePath, managers, clockMode, repeat = job
+
+    timer = timeit.default_timer
+    best = float('inf')
+    for _ in range(repeat):
+        start = timer()
+        program = loadInputFile(filePath)
+        columns = [tabulate(simulateAlgorithm(program, manager, clockMode))
+            for manager in managers]
+        best = min(best, timer() - start)
+
+    return filePath, columns, best
+
+
+def compareTables(expected, actual, managers):
+    '''
+    Returns a line for every difference between the expected table of an
+    input and the actual one
+    '''
+    differences = []
+    if len(expected) != len(actual):
+        return ["expected " + str(len(expected)) + " manager(s), got " +
+            str(len(actual))]
+
+    def show(stats):
+        return "aborted" if stats is None else "%d %d %d%%" % stats
+
+    for manager, want, got in zip(managers, expected, actual):
+        for key in sorted(set(want.keys()) | set(got.keys())):
+            if key not in got:
+                differences.append(manager + " task " + str(key) +
+                    ": missing")
+            elif key not in want:
+                differences.append(manager + " task " + str(key) +
+                    ": unexpected")
+            elif want[key] != got[key]:
+                differences.append(manager + " " + ("total" if key == "total"
+                    else "task " + str(key)) + ": expected " +
+                    show(want[key]) + ", got " + show(got[key]))
+
+    return differences
+
+
+def runRegression(filePaths, expectedSources, baselines=None, threshold=0.25,
+                  slack=0.01, clockMode=ClockMode.EVENT, numProcesses=None,
+                  repeat=1, managers=DEFAULT_MANAGERS):
+    '''
+    Simulates the input files across a pool of worker processes and checks
+    their stats against every source of expected tables (dicts mapping file
+    names to tables, see readOutputs and readResults) that has them. If
+    baselines (a dict mapping file names to seconds) are given, an input
+    also fails when its wall time exceeds its baseline by more than the
+    threshold (a fraction of it) plus slack seconds. Returns a list of
+    (file path, seconds, differences), in the order the files were given.
+    '''
+    jobs = [(filePath, managers, clockMode, repeat) for filePath in filePaths]
+
+    pool = multiprocessing.Pool(numProcesses)
+    try:
+        runs = pool.map(runInput, jobs, chunksize=1)
+    finally:
+        pool.terminate()
+
+    results = []
+    for filePath, columns, seconds in runs:
+        name = os.path.basename(filePath)
+        differences = []
+        for source, expected in expectedSources:
+            if name in expected:
+                differences += [source + ": " + line for line in
+                    compareTables(expected[name], columns, managers)]
+
+        if baselines and name in baselines:
+            limit = baselines[name] * (1 + threshold) + slack
+            if seconds > limit:
+                differences.append("took %.4fs, over the limit of %.4fs "
+                    "(baseline %.4fs)" % (seconds, limit, baselines[name]))
+
+        results.append((filePath, seconds, differences))
+
+    return results
+
+
+if __name__ == "__main__":
+    '''
+    Checks the stats of every input against the expected outputs, and their
+    wall times against stored baselines. Exits with 1 if any input fails.
+    '''
+    parser = argparse.ArgumentParser(
+        description="Checks the simulations of the inputs for regressions in "
+                    "their stats or their wall times",
+        epilog="ex.: python2.7 Regression.py --baselines timings.json "
+               "--update-baselines; python2.7 Regression.py --baselines "
+               "timings.json")
+    parser.add_argument("filePaths", nargs="*", metavar="filePath",
+        help="input files (default: every file in inputs/)")
+    parser.add_argument("--outputs", metavar="DIR",
+        default=os.path.join(ROOT, "outputs"),
+        help="directory of expected outputs (default: outputs/)")
+    parser.add_argument("--results", metavar="FILE",
+        default=os.path.join(ROOT, "testResults.txt"),
+        help="expected output of tester.sh (default: testResults.txt)")
+    parser.add_argument("--baselines", metavar="FILE", default=None,
+        help="JSON file of the wall time of each input to check against")
+    parser.add_argument("--update-baselines", action="store_true",
+        help="record the wall times of this run in the baselines file "
+             "instead of checking them")
+    parser.add_argument("--threshold", type=float, default=0.25,
+        help="fraction by which an input may be slower than its baseline "
+             "(default: 0.25)")
+    parser.add_argument("--slack", type=float, default=0.01,
+        help="seconds by which an input may be slower on top of the "
+             "threshold, so that timer noise on short runs doesn't fail "
+             "them (default: 0.01)")
+    parser.add_argument("--repeat", type=int, default=3,
+        help="times each input is simulated (the fastest counts)")
+    parser.add_argument("--processes", type=int, default=None,
+        help="number of worker processes (default: one per core); more "
+             "than there are cores skews the wall times")
+    parser.add_argument("--tick", action="store_true",
+        help="advance the clock one cycle at a time")
+    args = parser.parse_args()
+
+    filePaths = args.filePaths or sorted(glob.glob(os.path.join(ROOT,
+        "inputs", "*")))
+
+    expectedSources = []
+    if os.path.isdir(args.outputs):
+        expectedSources.append(("outputs", readOutputs(args.outputs)))
+    if os.path.isfile(args.results):
+        expectedSources.append(("testResults", readResults(args.results)))
+
+    baselines = {}
+    if args.baselines is not None and os.path.isfile(args.baselines):
+        with open(args.baselines, 'r') as file:
+            baselines = json.load(file)
+
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+    results = runRegression(filePaths, expectedSources,
+        None if args.update_baselines else baselines, args.threshold,
+        args.slack, clockMode, args.processes, args.repeat)
+
+    numFailed = 0
+    for filePath, seconds, differences in results:
+        print("%-20s %-6s %8.4fs" % (os.path.basename(filePath),
+            "FAIL" if differences else "ok", seconds))
+        for line in differences:
+            print("    " + line)
+        numFailed += 1 if differences else 0
+
+    print(str(len(results)) + " input(s): " + str(len(results) - numFailed) +
+        " passed, " + str(numFailed) + " failed")
+
+    if args.update_baselines and args.baselines is not None:
+        baselines.update((os.path.basename(filePath), seconds)
+            for filePath, seconds, _ in results)
+        with open(args.baselines, 'w') as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+
+    sys.exit(1 if numFailed else 0)
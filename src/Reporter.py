@@ -0,0 +1,239 @@
+import csv
+import json
+from collections import Counter, OrderedDict
+
+
+# Columns of a per-task row, in order
+FIELDS = ("file", "manager", "task", "taken", "waiting", "percentWaiting",
+    "aborted")
+
+# Percentiles of the waiting percentage given in the summaries
+PERCENTILES = (50, 95, 99)
+
+# Titles of the managers' columns in the table (their names otherwise)
+TABLE_TITLES = {"OPTIMISTIC":"FIFO"}
+
+
+def getTaskStats(task):
+    '''
+    Returns (time taken, waiting time, percentage of time spent waiting) for
+    a task that's done (all zeros if it was aborted)
+    '''
+    if task.isAborted():
+        return 0, 0, 0
+
+    taken = task.stats['running']
+    waiting = task.stats['waiting']
+    return taken, waiting, int(round(100.0 * waiting / taken))
+
+
+class Summary:
+    '''
+    Aggregates the rows of a simulation as they come: totals, as well as a
+    histogram of the tasks' waiting percentages (which are whole numbers)
+    from which percentiles are exact. Memory doesn't grow with the number
+    of tasks.
+    '''
+
+    def __init__(self):
+        self.numTasks = 0
+        self.numAborted = 0
+        self.taken = 0
+        self.waiting = 0
+        # Maps waiting percentages to the number of (non-aborted) tasks
+        self.histogram = Counter()
+
+
+    def addRow(self, row):
+        '''
+        Accounts for one task's row
+        '''
+        self.numTasks += 1
+        if row['aborted']:
+            self.numAborted += 1
+            return
+
+        self.taken += row['taken']
+        self.waiting += row['waiting']
+        self.histogram[row['percentWaiting']] += 1
+
+    def getPercentile(self, percentile):
+        '''
+        Returns the smallest waiting percentage that at least the given
+        percentile of the (non-aborted) tasks don't exceed (nearest rank)
+        '''
+        numFinished = self.numTasks - self.numAborted
+        if not numFinished:
+            return None
+
+        rank = max(1, -(-percentile * numFinished // 100)) # Rounded up
+        seen = 0
+        for percent in sorted(self.histogram.keys()):
+            seen += self.histogram[percent]
+            if seen >= rank:
+                return percent
+
+    def asDict(self):
+        '''
+        Returns the summary as a dict (ready to be written as JSON)
+        '''
+        percentWaiting = None
+        if self.taken:
+            percentWaiting = int(round(100.0 * self.waiting / self.taken))
+
+        return OrderedDict([
+            ('tasks', self.numTasks),
+            ('aborted', self.numAborted),
+            ('taken', self.taken),
+            ('waiting', self.waiting),
+            ('percentWaiting', percentWaiting),
+            ('percentiles', OrderedDict(('p' + str(p), self.getPercentile(p))
+                for p in PERCENTILES))
+        ])
+
+
+class TaskReporter:
+    '''
+    Receives every task of a simulation once it's done (see
+    Simulation.retireTask), streams its row to a writer if there's one and
+    adds it to the summary
+    '''
+
+    def __init__(self, managerName, filePath, writer=None):
+        self.managerName = managerName
+        self.filePath = filePath
+        self.writer = writer
+        self.summary = Summary()
+
+
+    def addTask(self, task):
+        '''
+        Reports a task that finished or was aborted
+        '''
+        taken, waiting, percentWaiting = getTaskStats(task)
+        row = OrderedDict(zip(FIELDS, (self.filePath, self.managerName,
+            task.id, taken, waiting, percentWaiting, task.isAborted())))
+
+        if self.writer is not None:
+            self.writer.writeRow(row)
+        self.summary.addRow(row)
+
+    def getSummary(self):
+        '''
+        Returns the summary tagged with the input file and the manager
+        '''
+        summary = OrderedDict([('file', self.filePath),
+            ('manager', self.managerName)])
+        summary.update(self.summary.asDict())
+        return summary
+
+
+class CSVWriter:
+    '''
+    Writes per-task rows as comma-separated values
+    '''
+
+    def __init__(self, file):
+        self.writer = csv.writer(file, lineterminator="\n")
+
+    def writeHeader(self):
+        '''
+        Writes the names of the columns
+        '''
+        self.writer.writerow(FIELDS)
+
+    def writeRow(self, row):
+        '''
+        Writes a task's row
+        '''
+        self.writer.writerow(row.values())
+
+
+class JSONLinesWriter:
+    '''
+    Writes per-task rows as JSON objects, one per line
+    '''
+
+    def __init__(self, file):
+        self.file = file
+
+    def writeHeader(self):
+        '''
+        Writes nothing (every row is self-describing)
+        '''
+        pass
+
+    def writeRow(self, row):
+        '''
+        Writes a task's row
+        '''
+        self.file.write(json.dumps(row) + "\n")
+
+
+# Maps the formats of per-task rows to their writers
+ROW_WRITERS = {"csv":CSVWriter, "jsonl":JSONLinesWriter}
+
+
+def renderTable(globalStats):
+    '''
+    Renders the stats of any number of managers over the same input (see
+    Manager.assembleStats) side by side, in the format specified by the
+    assignment
+    '''
+    titles = [TABLE_TITLES.get(stats['meta']['manager'],
+        stats['meta']['manager']) for stats in globalStats]
+    taskIDs = sorted(key for key in globalStats[0].keys()
+        if isinstance(key, int))
+
+    def cell(entry):
+        return str(entry['taken']) + "\t" + str(entry['waiting']) + "\t" + \
+            str(entry['percentWaiting']) + "%"
+
+    lines = ["", "\t"*3 + ("\t"*6).join(titles)]
+
+    for i in taskIDs:
+        line = ["\t"]
+        for stats in globalStats:
+            line.append("Task " + str(i) + "\t"*2)
+            if( stats[i]['aborted'] ):
+                line.append("aborted" + "\t"*4)
+            else:
+                line.append(cell(stats[i]) + "\t"*2)
+        lines.append("".join(line))
+
+    lines.append("\t" + ("\t"*2).join("total" + "\t"*2 + cell(stats['total'])
+        for stats in globalStats) + "\t"*2)
+
+    return "\n".join(lines) + "\n"
+
+
+def renderComparison(globalStats):
+    '''
+    Renders one line per manager over the same input: the tasks it finished
+    and aborted, their total time taken and waiting, the cycles the run took
+    and its throughput (tasks finished per cycle)
+    '''
+    lines = ["", "%-14s%10s%10s%10s%10s%10s%10s%12s" % ("manager",
+        "finished", "aborted", "taken", "waiting", "waiting%", "cycles",
+        "throughput")]
+
+    for stats in globalStats:
+        tasks = [stats[key] for key in stats.keys() if isinstance(key, int)]
+        numAborted = sum(1 for entry in tasks if entry['aborted'])
+        numFinished = len(tasks) - numAborted
+        cycles = stats['meta']['cycles']
+
+        lines.append("%-14s%10d%10d%10d%10d%9d%%%10d%12.3f" % (
+            stats['meta']['manager'], numFinished, numAborted,
+            stats['total']['taken'], stats['total']['waiting'],
+            stats['total']['percentWaiting'], cycles,
+            float(numFinished) / max(cycles, 1)))
+
+    return "\n".join(lines) + "\n"
+
+
+def renderSummaries(summaries):
+    '''
+    Renders the summaries of any number of simulations as JSON
+    '''
+    return json.dumps(summaries, indent=2)
@@ -0,0 +1,408 @@
+import numpy
+from collections import OrderedDict
+
+
+class SafetyEngine:
+    '''
+    Keeps the state that the Banker's algorithm reasons about as dense
+    matrices (rows are tasks, columns are resources) so that a safety check
+    doesn't need to copy any Task objects. Note that the matrices are updated
+    in place by the manager whenever units are granted, released or freed.
+
+    With few resources, each resource's column of needs is also kept sorted
+    (in place, moving a row past the ones in between whenever its need
+    changes) so that a safety check that a few scans of all the tasks don't
+    settle can sweep through them in order of need instead.
+
+    The state carries a version number that changes whenever it does, and
+    the outcomes of safety checks are cached per (task, resource, units,
+    version) so that a request retried in an unchanged state costs a lookup.
+
+    The total need of each resource is kept as well: a resource whose total
+    need fits within its available units can't hold up any task, so safety
+    checks leave it out, and a check in which every resource is like that
+    (e.g. the claims add up to no more than the units) is safe outright.
+    That only holds while no task has released more than it was granted, so
+    every resource is looked at as long as one has.
+    '''
+
+    # Most resources for which the needs are kept sorted
+    MAX_SORTED_RESOURCES = 3
+    # Rounds of the general safety check after which the sweep through the
+    # sorted needs takes over (a round costs about a third of a sweep, and
+    # most checks are settled in the first one)
+    MAX_GENERAL_ROUNDS = 3
+    # Most safety check outcomes that are cached
+    CACHE_SIZE = 4096
+
+    def __init__(self, numTasks, numResources, taskIDs=None):
+        # Maps task IDs to rows, unless they're 1 to numTasks (e.g. if only
+        # some of a program's tasks are simulated)
+        self.rows = None
+        if taskIDs is not None:
+            self.rows = {taskID:row for row, taskID in enumerate(taskIDs)}
+
+        # Units of each resource that can currently be handed out
+        self.available = numpy.zeros(numResources, dtype=numpy.int64)
+        # Units of each resource held by each task
+        self.allocation = numpy.zeros((numTasks, numResources),
+            dtype=numpy.int64)
+        # Max. additional units each task may ask for (claims - allocation)
+        self.need = numpy.zeros((numTasks, numResources), dtype=numpy.int64)
+        # Sum of each resource's column of (positive) needs
+        self.totalNeed = numpy.zeros(numResources, dtype=numpy.int64)
+        # Number of negative entries in the allocation (over-releases)
+        self.numOverdrawn = 0
+        # Tasks that are neither finished nor aborted
+        self.active = numpy.ones(numTasks, dtype=bool)
+
+        # For each resource, rows in order of need and the sorted needs
+        # (finished and aborted rows stay, with nothing held or needed)
+        self.isSorted = numResources <= self.MAX_SORTED_RESOURCES
+        self.sortedRows = [numpy.arange(numTasks) for _ in range(numResources)]
+        self.sortedNeed = [numpy.zeros(numTasks, dtype=numpy.int64)
+            for _ in range(numResources)]
+
+        # Changes whenever any of the above does
+        self.version = 0
+        # Maps (task ID, resource ID, units, version) to the outcome of the
+        # safety check, least recently used first
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.skips = 0 # Misses that were safe without simulating anything
+
+
+    def getRow(self, taskID):
+        '''
+        Returns the row of a task
+        '''
+        return taskID - 1 if self.rows is None else self.rows[taskID]
+
+    def setAvailable(self, resourceID, numUnits):
+        '''
+        Sets the number of available units of a resource
+        '''
+        self.available[resourceID - 1] = numUnits
+        self.version += 1
+
+    def freeUnits(self, resourceID, numUnits):
+        '''
+        Returns units to the pool of available units
+        '''
+        self.available[resourceID - 1] += numUnits
+        self.version += 1
+
+    def setClaims(self, taskID, resourceID, numUnits):
+        '''
+        Records a task's claim (what's already held counts towards it)
+        '''
+        row, col = self.getRow(taskID), resourceID - 1
+        self.setNeed(row, col, numUnits - self.allocation[row, col])
+        self.version += 1
+
+    def grantResource(self, taskID, resourceID, numUnits):
+        '''
+        Moves units from the available pool to the task
+        '''
+        row, col = self.getRow(taskID), resourceID - 1
+        self.available[col] -= numUnits
+        self.setAllocation(row, col, self.allocation[row, col] + numUnits)
+        self.setNeed(row, col, self.need[row, col] - numUnits)
+        self.version += 1
+
+    def releaseResource(self, taskID, resourceID, numUnits):
+        '''
+        Takes units away from the task (they only become available once the
+        manager frees them)
+        '''
+        row, col = self.getRow(taskID), resourceID - 1
+        self.setAllocation(row, col, self.allocation[row, col] - numUnits)
+        self.setNeed(row, col, self.need[row, col] + numUnits)
+        self.version += 1
+
+    def admitTask(self, taskID):
+        '''
+        Includes a task in future safety checks again, holding and needing
+        nothing (its row may have belonged to a retired task)
+        '''
+        row = self.getRow(taskID)
+        self.active[row] = True
+        for col in range(len(self.available)):
+            self.setAllocation(row, col, 0)
+            self.setNeed(row, col, 0)
+        self.version += 1
+
+    def retireTask(self, taskID):
+        '''
+        Excludes a finished or aborted task from future safety checks
+        '''
+        row = self.getRow(taskID)
+        self.active[row] = False
+        for col in range(len(self.available)):
+            self.setAllocation(row, col, 0)
+            self.setNeed(row, col, 0)
+        self.version += 1
+
+
+    def sortNeeds(self):
+        '''
+        Sorts each resource's column of needs anew, and adds them up (for
+        when the matrices were filled in wholesale)
+        '''
+        self.totalNeed = numpy.clip(self.need, 0, None).sum(axis=0)
+        self.numOverdrawn = int((self.allocation < 0).sum())
+        if self.isSorted:
+            for col in range(len(self.available)):
+                rows = numpy.argsort(self.need[:, col], kind='mergesort')
+                self.sortedRows[col] = rows
+                self.sortedNeed[col] = self.need[rows, col]
+        self.version += 1
+
+    def setAllocation(self, row, col, numUnits):
+        '''
+        Sets the units of a resource held by a task, keeping count of the
+        negative ones
+        '''
+        self.numOverdrawn += int(numUnits < 0) - \
+            int(self.allocation[row, col] < 0)
+        self.allocation[row, col] = numUnits
+
+    def setNeed(self, row, col, numUnits):
+        '''
+        Sets a task's need for a resource, keeping the needs sorted and
+        added up
+        '''
+        self.totalNeed[col] += max(numUnits, 0) - max(self.need[row, col], 0)
+        if self.isSorted and self.need[row, col] != numUnits:
+            self.moveRow(col, row, self.need[row, col], numUnits)
+
+        self.need[row, col] = numUnits
+
+    def findRow(self, col, row, need):
+        '''
+        Returns the position of the given row, whose need is as given, in a
+        resource's sorted rows
+        '''
+        needs = self.sortedNeed[col]
+        lo = needs.searchsorted(need, 'left')
+        hi = needs.searchsorted(need, 'right')
+        if hi - lo == 1:
+            return lo
+        return lo + numpy.flatnonzero(self.sortedRows[col][lo:hi] == row)[0]
+
+    def moveRow(self, col, row, oldNeed, newNeed):
+        '''
+        Moves the given row within a resource's sorted rows and needs, in
+        place, as its need changes from oldNeed to newNeed: only the entries
+        in between its old and new positions shift by one
+        '''
+        rows, needs = self.sortedRows[col], self.sortedNeed[col]
+        old = self.findRow(col, row, oldNeed)
+
+        if newNeed > oldNeed: # The entries up to its new position move down
+            new = needs.searchsorted(newNeed, 'left') - 1
+            rows[old:new] = rows[old + 1:new + 1]
+            needs[old:new] = needs[old + 1:new + 1]
+        else: # The entries from its new position move up
+            new = needs[:old].searchsorted(newNeed, 'left')
+            rows[new + 1:old + 1] = rows[new:old]
+            needs[new + 1:old + 1] = needs[new:old]
+
+        rows[new] = row
+        needs[new] = newNeed
+
+
+    def isSafe(self, taskID, resourceID, numUnits):
+        '''
+        True if granting the units to the task leaves the system in a safe
+        state, false otherwise (looked up in the cache if this state was
+        checked before)
+        '''
+        key = (taskID, resourceID, numUnits, self.version)
+
+        if key in self.cache:
+            self.hits += 1
+            safe = self.cache.pop(key) # Reinserted as most recently used
+        else:
+            self.misses += 1
+            safe = self.checkSafety(taskID, resourceID, numUnits)
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache.popitem(last=False)
+
+        self.cache[key] = safe
+        return safe
+
+    def isStateSafe(self):
+        '''
+        True if the current state is safe (nothing is pretend granted and
+        the checks aren't counted), false otherwise
+        '''
+        return self.isSafeGeneral(0, 0, 0, self.available.copy(),
+            numpy.arange(len(self.available)))
+
+    def getTightResources(self, row, col, numUnits):
+        '''
+        Returns the columns of the resources whose total need exceeds their
+        available units once the units are (pretend) granted. The others
+        can't hold up any task: whatever a task needs of them is at hand.
+        All of them if any task holds a negative number of units.
+        '''
+        if self.numOverdrawn:
+            return numpy.arange(len(self.available))
+
+        oldNeed = self.need[row, col]
+        totalNeed = self.totalNeed.copy()
+        totalNeed[col] += max(oldNeed - numUnits, 0) - max(oldNeed, 0)
+        available = self.available.copy()
+        available[col] -= numUnits
+
+        return numpy.flatnonzero(totalNeed > available)
+
+    def checkSafety(self, taskID, resourceID, numUnits):
+        '''
+        True if granting the units to the task leaves the system in a safe
+        state, false otherwise. Every task whose need fits within the
+        available units is (pretend) terminated at once, which is equivalent
+        to doing so one at a time since that only ever adds units. Only the
+        resources that may hold up tasks are looked at.
+        '''
+        row, col = self.getRow(taskID), resourceID - 1
+
+        cols = self.getTightResources(row, col, numUnits)
+        if not cols.size:
+            self.skips += 1
+            return True
+
+        # Pretend to grant the request
+        work = self.available.copy()
+        work[col] -= numUnits
+        self.allocation[row, col] += numUnits # Restored below
+
+        try:
+            if not self.isSorted:
+                return self.isSafeGeneral(row, col, numUnits, work, cols)
+
+            # The sorted needs are only swept if a few rounds of the general
+            # check didn't settle it
+            safe = self.isSafeGeneral(row, col, numUnits, work, cols,
+                self.MAX_GENERAL_ROUNDS)
+            if safe is not None:
+                return safe
+
+            if len(cols) == 1:
+                return self.isSafeSingle(work, cols[0], row,
+                    numUnits if cols[0] == col else 0)
+
+            # Needs in order, with the request's row moved to its new place
+            # (and back below)
+            oldNeed = self.need[row, col]
+            self.moveRow(col, row, oldNeed, oldNeed - numUnits)
+
+            try:
+                return self.isSafeSorted(self.sortedRows, self.sortedNeed,
+                    work, cols)
+
+            finally:
+                self.moveRow(col, row, oldNeed - numUnits, oldNeed)
+
+        finally:
+            self.allocation[row, col] -= numUnits
+
+    def isSafeGeneral(self, row, col, numUnits, work, cols, maxRounds=None):
+        '''
+        Safety check for any number of resources (the given columns):
+        repeatedly terminates every task whose need fits within the units
+        at hand. Returns None if that takes more than maxRounds rounds.
+        '''
+        self.need[row, col] -= numUnits # Restored below
+
+        try:
+            need = self.need[:, cols]
+            allocation = self.allocation[:, cols]
+            work = work[cols]
+
+            pending = numpy.flatnonzero(self.active)
+            numRounds = 0
+            while pending.size:
+                if numRounds == maxRounds:
+                    return None
+                numRounds += 1
+
+                fits = (need[pending] <= work).all(axis=1)
+                if not fits.any():
+                    return False
+
+                work += allocation[pending[fits]].sum(axis=0)
+                pending = pending[~fits]
+
+            return True
+
+        finally:
+            self.need[row, col] += numUnits
+
+    def isSafeSingle(self, work, col, row, numUnits):
+        '''
+        Safety check for a single resource (the given column): terminating
+        tasks in order of need, each of them has to fit within the units at
+        hand plus what the ones before it held. The units pretend granted to
+        the given row (already in its allocation) lower its need, which moves
+        it up in the order: rather than moving it, the tasks it would go
+        ahead of are checked with its units held before them.
+        '''
+        rows, needs = self.sortedRows[col], self.sortedNeed[col]
+        held = self.allocation[rows, col]
+        heldBefore = numpy.cumsum(held) - held
+        slack = work[col] + heldBefore - needs
+        if not numUnits:
+            return bool((slack >= 0).all())
+
+        old = self.findRow(col, row, self.need[row, col])
+        newNeed = needs[old] - numUnits
+        new = needs[:old].searchsorted(newNeed)
+
+        return bool(newNeed <= work[col] + heldBefore[new] and
+            (slack[:new] >= 0).all() and
+            (slack[new:old] + held[old] >= 0).all() and
+            (slack[old + 1:] >= 0).all())
+
+    def isSafeSorted(self, sortedRows, sortedNeed, work, cols):
+        '''
+        Safety check for a few resources (the given columns): a pointer per
+        resource sweeps through the tasks in order of need as the units at
+        hand grow, and a task is terminated once every pointer has gone past
+        it
+        '''
+        sortedRows = [sortedRows[col] for col in cols]
+        sortedNeed = [sortedNeed[col] for col in cols]
+        allocation = self.allocation[:, cols]
+        work = work[cols]
+
+        numResources = len(work)
+        numTasks = len(self.active)
+
+        coverage = numpy.zeros(numTasks, dtype=numpy.int64)
+        pointers = [0] * numResources
+        numTerminated = 0
+
+        while numTerminated < numTasks:
+            newlyCovered = []
+            for col in range(numResources):
+                end = numpy.searchsorted(sortedNeed[col], work[col], 'right')
+                if end > pointers[col]:
+                    rows = sortedRows[col][pointers[col]:end]
+                    coverage[rows] += 1
+                    newlyCovered.append(rows)
+                    pointers[col] = end
+
+            if not newlyCovered:
+                return False
+
+            # Rows that were just covered for their last resource
+            rows = numpy.concatenate(newlyCovered)
+            rows = numpy.unique(rows[coverage[rows] == numResources])
+
+            work += allocation[rows].sum(axis=0)
+            numTerminated += rows.size
+
+        return True
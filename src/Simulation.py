@@ -0,0 +1,740 @@
+import heapq
+import bisect
+import itertools
+from collections import OrderedDict
+
+from Task import Task
+from TaskStates import TaskStates
+from Resource import Resource
+from SafetyEngine import SafetyEngine
+from Policies import POLICIES
+
+
+class ManagerType:
+    '''
+    Mimic enums for required resource management algorithms (these are keys
+    of the registry of policies, which holds others, see Policies.py)
+    '''
+    OPTIMISTIC = "optimistic"
+    BANKER = "banker"
+
+
+class ClockMode:
+    '''
+    Mimic enums for the ways the simulation clock can advance
+    '''
+    TICK = 1 # One cycle at a time (reference implementation)
+    EVENT = 2 # Jumps straight to the next cycle where something can change
+
+
+class Simulation:
+    '''
+    Gathers all of the state of a single run of a resource manager over a
+    given input, so that any number of simulations can coexist within one
+    interpreter. Note that a simulation is characterized by the input's
+    compiled Program (which it doesn't modify), the type of manager (the key
+    of its Policy) and the clock mode. Tasks that are done can be streamed
+    to a reporter (see Reporter.TaskReporter), and the utilization of the
+    resources in every cycle to a recorder (see
+    Recorder.UtilizationRecorder).
+    '''
+
+    def __init__(self, program, manager, clockMode=ClockMode.EVENT,
+                 reporter=None, recorder=None):
+        self.manager = manager # Resource management algorithm
+        self.policy = POLICIES[manager](self) # Makes its decisions
+        self.clockMode = clockMode # How the clock advances
+        self.reporter = reporter # Told about every task once it's done
+        self.recorder = recorder # Told about the resources after every cycle
+
+        # Maps all task IDs to all Task objects
+        self.tasks = {}
+        # All Task objects in order of their IDs (the order they're processed
+        # in within a cycle)
+        self.taskList = []
+        # Maps task IDs to waiting tasks (in order tasks were told to wait)
+        self.waitingTasks = OrderedDict()
+        # Maps resource IDs to the same (ID -> task) for the active tasks
+        # waiting for units of that resource, and their IDs to the (number
+        # they were given when told to wait, resource ID)
+        self.waitQueues = {}
+        self.waitingOn = {}
+        self.waitNumbers = itertools.count()
+        # Tasks are placed here when they are freed from waiting
+        # (makes sure tasks are only processed once per cycle)
+        self.readyTasks = set()
+
+        # What happened since the waiting tasks were last retried: IDs of
+        # resources that gained available units, and whether tasks were
+        # retired (see wakeWaiting())
+        self.freedResources = set()
+        self.tasksRetired = False
+
+        # Maps resource IDs to Resource objects
+        self.resources = {}
+        # Maps resource IDs to number of units that will be freed.
+        # (freed units are placed here until the ends of the cycles)
+        self.freeBuffer = {}
+
+        # Matrix view of claims, allocations and available units (Banker's)
+        self.safety = None
+
+        # Counts of active and waiting tasks (kept up to date by the tasks)
+        self.states = TaskStates()
+
+        self.sysClock = 0
+        # Set once all tasks were processed in the current cycle
+        self.cycleProcessed = False
+        # Cycle in which a deadlock was first resolved, if any (deadlocks are
+        # the only decisions that depend on the state of every task, see
+        # Partition.py)
+        self.deadlockCycle = None
+
+        # Informative messages, in the order they were issued
+        self.messages = []
+
+        self.loadProgram(program)
+
+
+    def simulate(self, stopAt=None):
+        '''
+        Runs the simulation with the selected clock mode and returns the
+        tasks. It runs to completion, unless a cycle to stop at is given: it
+        then stops before processing that cycle, in a state that either clock
+        mode can carry on from (see settle()), and can be resumed by calling
+        this method again.
+        '''
+        if stopAt is None:
+            stopAt = float('inf')
+
+        if self.clockMode is ClockMode.TICK:
+            self.run(stopAt)
+        else:
+            self.runEvents(stopAt)
+
+        return self.tasks
+
+
+    def loadProgram(self, program):
+        '''
+        Builds the 'resources' and 'tasks' structures out of a compiled
+        program (tasks share its instructions), which may only have some of
+        the tasks of an input (see Program.withTasks())
+        '''
+        taskIDs = sorted(program.tables.keys())
+        self.tasks = {x:Task(x, program.tables[x], self.states)
+            for x in taskIDs}
+        self.taskList = [self.tasks[x] for x in taskIDs]
+        for task in self.taskList:
+            self.states.addTask(task)
+
+        numResources = program.numResources + 1
+        self.resources = {x:Resource(x, program.units[x - 1])
+            for x in range(1, numResources)}
+        self.waitQueues = {x:OrderedDict() for x in self.resources.keys()}
+
+        self.safety = SafetyEngine(len(taskIDs), program.numResources,
+            None if len(taskIDs) == program.numTasks else taskIDs)
+        for rID, r in self.resources.iteritems():
+            self.safety.setAvailable(rID, r.numAvailableUnits)
+
+
+    def isFinished(self):
+        '''
+        True if there are no more active tasks in the process, false otherwise
+        '''
+        return self.states.numActive == 0
+
+
+    def isDeadlocked(self):
+        '''
+        True if all active tasks are waiting, false otherwise
+        (relevant to the optimistic algorithm)
+        '''
+        if self.isFinished(): # If it's finished, it's not deadlocked
+            return False
+
+        return self.states.numWaiting == self.states.numActive
+
+
+    def isSafe(self, task, instruction):
+        '''
+        Determines if a given task + instruction leads to a safe state and
+        returns true if so, false otherwise.
+
+        Dijkstra's algorithm to determine if a state is safe:
+            1. State is safe if no tasks are left
+            2. Look for task whose requests for all resources can be
+               fulfilled
+                -   If none exist, state is not safe
+                -   Else: pretend to grant all resources to it, terminate it
+                    and continue to apply this method until all tasks are
+                    processed
+        '''
+        if self.isFinished(): return True
+
+        # Abort task if it exceeds its claim
+        if instruction.numUnits > task.getMaxAddl()[instruction.resourceType]:
+            self.leaveWaiting(task)
+
+            for rID in task.heldResources.keys():
+                self.placeIntoFreeBuffer(rID, task.heldResources[rID])
+
+            task.abort()
+            self.retireTask(task)
+
+            # Record informative message (printed with the stats)
+            msg =   "During cycle " + str(self.sysClock) + "-" + \
+                    str(self.sysClock+1)
+            msg +=  " of Banker's algorithm\n"
+            msg +=  "\tTask " + str(task.id)
+            msg +=  "'s request exceeds its claim; aborted; "
+            msg +=  str(instruction.numUnits) + " units available next cycle"
+            self.messages.append(msg)
+            return False
+
+        # A request that exceeds the available units isn't granted either way
+        # (the task waits whether or not the state would be safe)
+        resource = self.resources[instruction.resourceType]
+        if instruction.numUnits > resource.numAvailableUnits:
+            return False
+
+        # Pretend to grant the request and look for a safe sequence
+        return self.safety.isSafe(task.id, instruction.resourceType,
+            instruction.numUnits)
+
+
+    def retireTask(self, task):
+        '''
+        Accounts for a task that finished or was aborted
+        '''
+        self.safety.retireTask(task.id)
+        self.tasksRetired = True
+        if self.reporter is not None:
+            self.reporter.addTask(task)
+
+
+    def getBlockedTasks(self):
+        '''
+        Returns the active tasks that are waiting, in order of their IDs
+        '''
+        return sorted((t for t in self.waitingTasks.values() if t.isActive()),
+            key=lambda t: t.id)
+
+    def getFreeUnits(self):
+        '''
+        Returns a dict mapping resource IDs to the units that are available
+        once the free buffer is emptied
+        '''
+        return {rID:r.numAvailableUnits + self.freeBuffer.get(rID, 0)
+            for rID, r in self.resources.iteritems()}
+
+
+    def countDeadlockVictims(self, blocked):
+        '''
+        Given the deadlocked tasks in order of their IDs, returns how many of
+        the lowest numbered ones have to be aborted for the units they free to
+        satisfy the request of one of the others (all of them if none can be
+        satisfied). This is where aborting them one at a time, and retrying
+        every request after each abort, would stop.
+        (Relevant to the optimistic algorithm).
+        '''
+        # Units of each resource once the free buffer is emptied
+        free = self.getFreeUnits()
+
+        # Maps resource IDs to the ranks (1 = lowest ID) of the blocked tasks
+        # holding units of it, and the units freed by aborting up to each one
+        holders = {rID:([], []) for rID in self.resources.keys()}
+        for rank, task in enumerate(blocked, 1):
+            for rID, units in task.heldResources.iteritems():
+                if units:
+                    ranks, freed = holders[rID]
+                    ranks.append(rank)
+                    freed.append(units + (freed[-1] if freed else 0))
+
+        numVictims = len(blocked)
+        for rank, task in enumerate(blocked, 1):
+            if numVictims == 1: # Can't do with fewer
+                break
+
+            ins = task.getCurrentInstruction()
+            missing = ins.numUnits - free[ins.resourceType]
+
+            # Fewest aborts that free the missing units (at least one task is
+            # always aborted)
+            ranks, freed = holders[ins.resourceType]
+            i = bisect.bisect_left(freed, missing)
+            if missing <= 0:
+                numAborts = 1
+            elif i < len(freed):
+                numAborts = ranks[i]
+            else:
+                continue
+
+            if numAborts < rank:
+                numVictims = min(numVictims, numAborts)
+
+        return numVictims
+
+
+    def resolveDeadlock(self):
+        '''
+        Abort the lowest numbered deadlocked tasks (in terms of task ID) that
+        have to go for another one's request to be satisfied, in one batch,
+        and free their resources. Repeat this process while there's deadlock.
+        (Relevant to the optimistic algorithm).
+        '''
+        while( self.isDeadlocked() ):
+            self.noteDeadlock()
+            blocked = self.getBlockedTasks()
+            numVictims = self.countDeadlockVictims(blocked)
+
+            for task in blocked[:numVictims]:
+                heldResources = task.heldResources
+                for rID in heldResources.keys():
+                    self.placeIntoFreeBuffer(rID, heldResources[rID])
+
+                self.leaveWaiting(task)
+                task.abort()
+                self.retireTask(task)
+
+            self.cleanFreeBuffer()
+            self.retryBlocked(blocked[numVictims:])
+
+
+    def preemptDeadlock(self, victims):
+        '''
+        Counterpart of resolveDeadlock() that preempts the given deadlocked
+        tasks (see preemptTask()) rather than aborting any, and retries the
+        requests of the other blocked tasks with the units they gave back
+        (relevant to the preemptive policies)
+        '''
+        self.noteDeadlock()
+        blocked = self.getBlockedTasks()
+
+        for task in victims:
+            self.preemptTask(task)
+        self.cleanFreeBuffer()
+        self.retryBlocked([task for task in blocked if task not in victims])
+
+    def preemptTask(self, task):
+        '''
+        Takes back every unit a waiting task holds (they're freed as a
+        release's are) and rolls it back to where it held nothing. It then
+        carries on from there once the next cycle is over, as the tasks whose
+        requests are granted while a deadlock is resolved do.
+        '''
+        for rID, numUnits in task.heldResources.items():
+            if numUnits:
+                self.placeIntoFreeBuffer(rID, numUnits)
+                task.releaseResource(rID, numUnits)
+                self.safety.releaseResource(task.id, rID, numUnits)
+
+        task.stopWaiting(self.getWaitClock())
+        self.leaveWaiting(task)
+        task.rollBack()
+        self.readyTasks.add(task)
+
+    def noteDeadlock(self):
+        '''
+        Notes the cycle of the first deadlock that's resolved
+        '''
+        if self.deadlockCycle is None:
+            self.deadlockCycle = self.sysClock
+
+    def retryBlocked(self, blocked):
+        '''
+        Retries the requests of the given blocked tasks once units were freed
+        to resolve a deadlock, through the policy as any retry (the tasks
+        that are granted them move on)
+        '''
+        for task in blocked:
+            ins = task.getCurrentInstruction()
+            if(ins.command == "request"):
+                self.policy.request(task, ins)
+                if( not task.isWaiting() ):
+                    task.incInstruction()
+
+
+    def placeIntoFreeBuffer(self, resourceID, numUnits):
+        '''
+        Inserts mappings of resource IDs to corresponding units into a "buffer"
+        that's emptied once per cycle
+        '''
+        if( resourceID in self.freeBuffer.keys() ):
+            self.freeBuffer[resourceID] += numUnits
+        else:
+            self.freeBuffer[resourceID] = numUnits
+
+
+    def cleanFreeBuffer(self):
+        '''
+        Places the units corresponding to given resource IDs in the "buffer"
+        into the structure of resources
+        '''
+        for rID in self.freeBuffer.keys():
+            numUnits = self.freeBuffer[rID]
+            if self.resources[rID].freeUnits(numUnits):
+                self.safety.freeUnits(rID, numUnits)
+                if numUnits: # Its waiting tasks may be granted units now
+                    self.freedResources.add(rID)
+            del self.freeBuffer[rID]
+
+
+    def standardRequest(self, task, instruction):
+        '''
+        Fulfills the request if there are available resources
+        (called by all resource managing algorithms)
+        '''
+        if( task.remainingDelay ): # Nothing to do for now
+            task.countDownDelay(); return
+
+        resource = self.resources[instruction.resourceType]
+
+        if( instruction.numUnits <= resource.numAvailableUnits ):
+            # Units can be granted!
+            # Freed from waiting when request can be satisfied
+            task.stopWaiting(self.getWaitClock())
+            # Note that tasks were "readified" on this cycle
+            self.readyTasks.add(task)
+            self.leaveWaiting(task)
+
+            # The request can be fulfilled
+            if( resource.takeUnits(instruction.numUnits) ):
+                task.grantResource(resource.id, instruction.numUnits)
+                self.safety.grantResource(task.id, resource.id,
+                    instruction.numUnits)
+
+        else:
+            # Units can't be granted
+            self.waitTask(task, instruction)
+
+
+    def waitTask(self, task, instruction):
+        '''
+        Tells the task to wait until units of the resource its request is for
+        become available
+        '''
+        task.wait(self.sysClock)
+        if not task.id in self.waitingTasks: # Enter the waiting tasks
+            self.waitingTasks[task.id] = task
+
+            # (A task aborted for exceeding its claim gets here as well)
+            if task.isActive():
+                rID = instruction.resourceType
+                self.waitQueues[rID][task.id] = task
+                self.waitingOn[task.id] = (next(self.waitNumbers), rID)
+
+
+    def leaveWaiting(self, task):
+        '''
+        Takes the task out of the waiting tasks (if it's among them)
+        '''
+        if task.id in self.waitingTasks:
+            del self.waitingTasks[task.id]
+            if task.id in self.waitingOn:
+                del self.waitQueues[self.waitingOn.pop(task.id)[1]][task.id]
+
+
+    def isFirstInLine(self, task, resourceID):
+        '''
+        True if no other task waits for units of the resource ahead of the
+        given one, false otherwise
+        '''
+        queue = self.waitQueues[resourceID]
+        return not queue or next(queue.itervalues()) is task
+
+
+    def hasWakeups(self):
+        '''
+        True if some waiting tasks have to be retried (see wakeWaiting()),
+        false otherwise
+        '''
+        if self.policy.WAKES_ALL:
+            return bool(self.waitingTasks) and bool(self.freedResources
+                or self.tasksRetired)
+
+        return any(self.waitQueues[rID] for rID in self.freedResources)
+
+
+    def wakeWaiting(self):
+        '''
+        Returns the waiting tasks that have to be retried, in the order the
+        policy retries them. A refused request can't be granted until units
+        are freed: only tasks waiting for resources that gained units since
+        the last time are retried (all of them if the policy's decisions
+        depend on the whole state, and units were freed or tasks retired).
+        The others would be refused again.
+        '''
+        freed, retired = self.freedResources, self.tasksRetired
+        self.freedResources = set()
+        self.tasksRetired = False
+
+        if self.policy.WAKES_ALL:
+            if not (freed or retired):
+                return []
+            waiting = self.waitingTasks.values()
+
+        else:
+            waiting = [task for rID in freed
+                for task in self.waitQueues[rID].itervalues()]
+            if len(freed) > 1: # Back in the order they were told to wait
+                waiting.sort(key=lambda t: self.waitingOn[t.id][0])
+
+        return self.policy.orderWaiting(waiting) if waiting else []
+
+
+    def wakeAll(self):
+        '''
+        Has every waiting task retried in the next cycle
+        '''
+        self.freedResources = set(self.resources.keys())
+        self.tasksRetired = True
+
+
+    def getWaitClock(self):
+        '''
+        Returns the first cycle that waiting tasks weren't charged for yet:
+        the current one, until all tasks were processed in it
+        '''
+        return self.sysClock + 1 if self.cycleProcessed else self.sysClock
+
+
+    def bankerRequest(self, task, instruction):
+        '''
+        Wrapper around standardRequest() that proceeds only if the state is
+        safe
+        '''
+        if self.isSafe(task, instruction):
+            self.standardRequest(task, instruction)
+
+        else:
+            self.waitTask(task, instruction)
+
+
+    def standardRelease(self, task, instruction):
+        '''
+        Fulfills the release (the units are placed into the free buffer)
+        '''
+        resource = self.resources[instruction.resourceType]
+        if( instruction.numUnits <= resource.numBusyUnits ):
+            self.placeIntoFreeBuffer(resource.id, instruction.numUnits)
+            task.releaseResource(resource.id, instruction.numUnits)
+            self.safety.releaseResource(task.id, resource.id,
+                instruction.numUnits)
+
+
+    def bankerProcessClaims(self, task, initInstruction):
+        '''
+        Aborts task if it's asking for unknown resources or way too many units
+        (analyzes the claims)
+        '''
+        rType = initInstruction.resourceType
+        rUnits = initInstruction.numUnits
+
+        if( not rType in self.resources.keys()
+            # Task is not getting accepted
+            or rUnits > self.resources[rType].numTotUnits ):
+            task.abort()
+            self.retireTask(task)
+
+            # Record informative message (printed with the stats)
+            msg =   "Banker aborts task " + str(task.id) + \
+                    " before run begins:\n"
+            msg +=  "\tclaim for resource " + str(rType) + " (" + \
+                    str(rUnits) + \
+                    ") exceeds number of units present (" + \
+                    str(self.resources[rType].numTotUnits) + ")"
+            self.messages.append(msg)
+
+        else: # We're in!
+            task.setClaims(rType, rUnits)
+            self.safety.setClaims(task.id, rType, rUnits)
+
+
+    def execute(self, task, instruction):
+        '''
+        Dispatcher for each type of request that a task can make
+        '''
+        if( task.remainingDelay ): # Nothing to do for now
+            task.countDownDelay(); return
+
+        if( instruction.command == "initiate" ):
+            self.policy.processClaim(task, instruction)
+
+        if( instruction.command == "request" ):
+            self.policy.request(task, instruction)
+
+        elif( instruction.command == "release" ):
+            self.policy.release(task, instruction)
+
+
+        if not task.isWaiting(): # Carry on (waiting time is charged when
+            # the task stops waiting)
+            task.incInstruction()
+            if task.isFinished():
+                task.clockEndTime(self.sysClock)
+                if not task.isAborted(): # Otherwise retired already
+                    self.retireTask(task)
+
+
+    def run(self, stopAt=float('inf')):
+        '''
+        Proceeds while there are still active tasks (and the clock hasn't
+        reached stopAt), and follows this order:
+        1. Process blocked tasks that may be granted units, in the order they
+           were told to wait
+        2. Process non-blocked tasks
+        3. Let the policy wrap up the cycle (e.g. the optimistic manager
+           checks if there's deadlock)
+        '''
+        while not self.isFinished() and self.sysClock < stopAt:
+            # Process blocked tasks that may be granted units (in the order
+            # they were told to wait, unless the policy says otherwise)
+            for task in self.wakeWaiting():
+                if task.isActive(): # Should be all
+                    ins = task.getCurrentInstruction()
+                    self.execute(task, ins)
+
+            # Process non-blocked tasks
+            for task in self.taskList:
+                if( task.isActive() and not task.isWaiting()
+                    and not task in self.readyTasks ):
+                    ins = task.getCurrentInstruction()
+                    self.execute(task, ins)
+
+            self.readyTasks = set() # Reset ready tasks
+            self.cycleProcessed = True
+
+            self.policy.endCycle()
+            self.endCycle()
+
+        self.settle()
+
+
+    def endCycle(self):
+        '''
+        Makes the units freed during the cycle available and moves the clock
+        on to the next one
+        '''
+        # Freed units didn't go into 'resources', but in this buffer to make
+        # sure that tasks don't use them more than one/cycle
+        self.cleanFreeBuffer()
+        self.recordUtilization()
+        self.sysClock += 1
+        self.cycleProcessed = False
+
+
+    def recordUtilization(self, numCycles=1):
+        '''
+        Tells the recorder (if there's one) about the units of each resource
+        and the tasks waiting for it, which stay the same for numCycles
+        '''
+        if self.recorder is not None:
+            resources = [self.resources[x]
+                for x in sorted(self.resources.keys())]
+            self.recorder.record([r.numAvailableUnits for r in resources],
+                [r.numBusyUnits for r in resources],
+                [len(self.waitQueues[r.id]) for r in resources], numCycles)
+
+
+    def scheduleTask(self, readyQueue, task, cycle):
+        '''
+        Queues a task that isn't waiting for the cycle in which its current
+        instruction's delay will have elapsed
+        (relevant to the event-driven clock)
+        '''
+        if task.isActive() and not task.isWaiting():
+            readyAt = cycle + task.remainingDelay
+            heapq.heappush(readyQueue, (readyAt, task.id))
+
+
+    def runEvents(self, stopAt=float('inf')):
+        '''
+        Event-driven counterpart of run() which yields the same stats.
+        Rather than counting delays down one cycle at a time, tasks that
+        aren't waiting sit in a priority queue keyed by the cycle in which
+        their current instruction is ready. Cycles are processed in the same
+        order as in run(), but the clock jumps over those in which nothing can
+        change: no instruction is ready, and no units were freed for blocked
+        tasks since they were refused (see wakeWaiting()).
+        '''
+        # Heap of (cycle in which the current instruction is ready, task ID)
+        readyQueue = []
+        for task in self.tasks.values():
+            self.scheduleTask(readyQueue, task, self.sysClock)
+
+        while not self.isFinished() and self.sysClock < stopAt:
+            # Process blocked tasks that may be granted units (in the order
+            # they were told to wait, unless the policy says otherwise)
+            for task in self.wakeWaiting():
+                if task.isActive(): # Should be all
+                    ins = task.getCurrentInstruction()
+                    self.execute(task, ins)
+
+                    if not (task.isActive() and task.isWaiting()):
+                        # Freed tasks move on to their next instruction
+                        # on the next cycle
+                        self.scheduleTask(readyQueue, task, self.sysClock + 1)
+
+            # Process non-blocked tasks whose instructions are ready (popped in
+            # the order of their IDs, since they're all ready on this cycle)
+            while readyQueue and readyQueue[0][0] <= self.sysClock:
+                task = self.tasks[heapq.heappop(readyQueue)[1]]
+                if( task.isActive() and not task.isWaiting()
+                    and not task in self.readyTasks ):
+                    ins = task.getCurrentInstruction()
+                    # Its delay has elapsed
+                    task.countDownDelay(task.remainingDelay)
+                    self.execute(task, ins)
+
+                    self.scheduleTask(readyQueue, task, self.sysClock + 1)
+
+            self.readyTasks = set() # Reset ready tasks
+            self.cycleProcessed = True
+
+            # E.g. the optimistic manager checks if there's deadlock
+            if self.policy.endCycle():
+                # Tasks freed here sit out the next cycle (as they do in run())
+                for task in self.readyTasks:
+                    self.scheduleTask(readyQueue, task, self.sysClock + 2)
+                self.readyTasks = set()
+
+            self.endCycle()
+
+            # Blocked tasks have to be retried on the next cycle only if units
+            # were freed for them since they were refused (the cycles skipped
+            # count as waiting time all the same)
+            nextCycle = self.sysClock
+            if readyQueue and not self.hasWakeups():
+                nextCycle = max(self.sysClock, readyQueue[0][0])
+
+            nextCycle = min(nextCycle, stopAt)
+            if nextCycle > self.sysClock: # Nothing changes in between
+                self.recordUtilization(nextCycle - self.sysClock)
+                self.sysClock = nextCycle
+
+        self.settle(readyQueue)
+
+
+    def settle(self, readyQueue=()):
+        '''
+        Brings the state in between two cycles to the form run() keeps it in,
+        which is where either clock mode can carry on from: every task's
+        remaining delay counts the cycles until its instruction is ready
+        (the event-driven clock only keeps that in its queue), and tasks
+        that have to sit out the next cycle have one more cycle of delay
+        instead of being among the ready tasks. Waiting tasks are charged the
+        waiting time so far.
+        '''
+        for readyAt, taskID in readyQueue:
+            task = self.tasks[taskID]
+            if task.isActive() and not task.isWaiting():
+                task.remainingDelay = readyAt - self.sysClock
+
+        for task in self.readyTasks:
+            task.remainingDelay += 1
+        self.readyTasks = set()
+
+        for task in self.waitingTasks.values():
+            task.chargeWaitingTime(self.sysClock)
@@ -0,0 +1,227 @@
+#!/usr/bin/python2.7
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import itertools
+import multiprocessing
+
+from Simulation import ClockMode
+from Policies import POLICIES
+from Reporter import TaskReporter
+from Manager import (loadInputFile, simulateAlgorithm, parseManagers,
+    DEFAULT_MANAGERS)
+
+
+# Program being swept (loaded once by each worker process, see initWorker)
+sweptProgram = None
+
+
+def parseRange(text):
+    '''
+    Parses a range of units: "lo-hi", "lo-hi:step" or a single number
+    (ex. "2-10:2" stands for 2, 4, 6, 8 and 10)
+    '''
+    try:
+        bounds, _, step = text.partition(":")
+        lo, _, hi = bounds.partition("-")
+        lo = int(lo)
+        hi = int(hi) if hi else lo
+        step = int(step) if step else 1
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid range of units '" + text +
+            "' (ex. 2-10:2)")
+
+    if lo < 0 or hi < lo or step < 1:
+        raise argparse.ArgumentTypeError("invalid range of units '" + text +
+            "' (ex. 2-10:2)")
+
+    return range(lo, hi + 1, step)
+
+
+def initWorker(filePath, cacheDir):
+    '''
+    Loads the swept input file once per worker process
+    '''
+    global sweptProgram
+    sweptProgram = loadInputFile(filePath, cacheDir)
+
+
+def simulatePoint(job):
+    '''
+    Unpacks a (units, managers, clock mode) job and simulates each manager
+    over the swept program with those units of each resource. Returns the
+    units along with a dict mapping each manager to its total time taken and
+    waiting and its number of aborted tasks.
+    '''
+    units, managers, clockMode = job
+    program = sweptProgram.withUnits(units)
+
+    results = {}
+    for manager in managers:
+        reporter = TaskReporter(POLICIES[manager].NAME, None)
+        simulateAlgorithm(program, manager, clockMode, reporter=reporter)
+        summary = reporter.summary
+        results[manager] = {'taken':summary.taken,
+            'waiting':summary.waiting, 'aborted':summary.numAborted}
+
+    return list(units), results
+
+
+def hashInput(filePath):
+    '''
+    Returns the SHA-1 digest of the contents of an input file
+    '''
+    digest = hashlib.sha1()
+    with open(filePath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def readJournal(journalPath, header):
+    '''
+    Returns the points recorded in a sweep's journal, as a dict mapping units
+    to results. The journal has to belong to the same sweep, over the same
+    contents of the input (see header). A last line cut short by an
+    interruption is truncated away, so that the next point starts a line of
+    its own.
+    '''
+    done = {}
+    if not os.path.isfile(journalPath):
+        return done
+
+    with open(journalPath, 'rb+') as file:
+        # Complete lines only
+        text = file.read()
+        text = text[:text.rfind("\n") + 1]
+        file.truncate(len(text))
+    lines = text.splitlines()
+
+    if lines and json.loads(lines[0]) != header:
+        raise ValueError("Journal '" + journalPath + "' belongs to another "
+            "sweep, or the input changed since")
+
+    for line in lines[1:]:
+        try:
+            point = json.loads(line)
+        except ValueError:
+            continue # Mangled
+        done[tuple(point['units'])] = point['results']
+
+    return done
+
+
+def sweep(filePath, unitRanges, managers=DEFAULT_MANAGERS,
+          clockMode=ClockMode.EVENT, numProcesses=None, journalPath=None,
+          cacheDir=None):
+    '''
+    Simulates the managers over the input file for every combination of the
+    given ranges of units (one per resource, in order of resource ID) across
+    a pool of worker processes. Returns a dict mapping units to results (see
+    simulatePoint(job)). If a journal is given, every point is appended to it
+    as soon as it's done, and points it already holds aren't simulated again.
+    '''
+    header = {'file':os.path.abspath(filePath), 'sha1':hashInput(filePath),
+        'managers':list(managers), 'clock':clockMode}
+    done = {}
+    journal = None
+    if journalPath is not None:
+        done = readJournal(journalPath, header)
+        journal = open(journalPath, 'a')
+        if not os.path.getsize(journalPath):
+            journal.write(json.dumps(header) + "\n")
+
+    points = list(itertools.product(*unitRanges))
+    jobs = [(units, managers, clockMode)
+        for units in points if units not in done]
+
+    pool = multiprocessing.Pool(numProcesses, initWorker, (filePath, cacheDir))
+    try:
+        for units, results in pool.imap_unordered(simulatePoint, jobs):
+            done[tuple(units)] = results
+            if journal is not None:
+                journal.write(json.dumps({'units':units,
+                    'results':results}) + "\n")
+                journal.flush()
+    finally:
+        pool.terminate()
+        if journal is not None:
+            journal.close()
+
+    return {units:done[units] for units in points}
+
+
+def renderSweep(points, managers):
+    '''
+    Renders a line per point, in order of units, with the total time taken
+    and waiting and the number of aborted tasks for each manager
+    '''
+    numResources = len(next(iter(points))) if points else 0
+    unitColumns = ["units " + str(rID) for rID in range(1, numResources + 1)]
+
+    header = "".join("%10s" % column for column in unitColumns)
+    for manager in managers:
+        name = POLICIES[manager].NAME
+        header += "%20s%10s%10s" % (name + " taken", "waiting", "aborted")
+    lines = [header]
+
+    for units in sorted(points.keys()):
+        line = "".join("%10d" % u for u in units)
+        for manager in managers:
+            result = points[units][manager]
+            line += "%20d%10d%10d" % (result['taken'], result['waiting'],
+                result['aborted'])
+        lines.append(line)
+
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    '''
+    Runs the managers over an input file for every combination of the given
+    numbers of units of each resource and prints a table of the outcomes
+    '''
+    parser = argparse.ArgumentParser(
+        description="Sweeps the numbers of units of each resource of an input",
+        epilog="ex.: python2.7 Sweep.py --units 1-8 --units 2-10:2 "
+               "--journal sweep.jsonl input-05.txt")
+    parser.add_argument("filePath", help="input file")
+    parser.add_argument("--units", type=parseRange, action="append",
+        default=[], help="range of units of the next resource type (ex. 1-8, "
+                         "2-10:2); the rest keep the input's units")
+    parser.add_argument("--managers", type=parseManagers,
+        default=DEFAULT_MANAGERS,
+        help="comma-separated managers to simulate (default: "
+             "optimistic,banker)")
+    parser.add_argument("--processes", type=int, default=None,
+        help="number of worker processes (default: one per core)")
+    parser.add_argument("--journal", metavar="FILE", default=None,
+        help="record finished points in this file, and skip the points it "
+             "already holds (to resume an interrupted sweep)")
+    parser.add_argument("--cache", metavar="DIR", default=None,
+        help="directory of binary traces (see Manager.py)")
+    parser.add_argument("--tick", action="store_true",
+        help="advance the clock one cycle at a time")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.filePath):
+        print("\nCan't find: '" + args.filePath + "'.\n"); exit(0)
+
+    units = loadInputFile(args.filePath, args.cache).units
+    if len(args.units) > len(units):
+        parser.error("the input only has " + str(len(units)) +
+            " resource type(s)")
+    unitRanges = args.units + [[u] for u in units[len(args.units):]]
+
+    clockMode = ClockMode.TICK if args.tick else ClockMode.EVENT
+
+    try:
+        points = sweep(args.filePath, unitRanges, args.managers, clockMode,
+            args.processes, args.journal, args.cache)
+    except ValueError as e:
+        sys.stderr.write(str(e) + "\n"); exit(1)
+
+    sys.stdout.write(renderSweep(points, args.managers))
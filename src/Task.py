@@ -3,18 +3,36 @@ class Task:
     Gathers all data pertaining to tasks and makes it available through
     a number of getters and setters. Note that a task is mainly characterized
     by a unique ID, a set of instructions and a state at a given point in
-    time (active, waiting, aborted or finished).
+    time (active, waiting, aborted or finished). The instructions belong to
+    a compiled Program and are never modified: the task only keeps a cursor
+    into them and the remaining delay of the current one. State changes are
+    reported to the simulation's TaskStates.
     '''
 
-    def __init__(self, id):
+    def __init__(self, id, instructions, states):
         self.id = id # Uniquely identifies it
-        self.instructions = [ ] # Set of instructions in relevant order
+        # Set of instructions in relevant order (an InstructionTable)
+        self.instructions = instructions
         self.currInstruction = 0 # Used to iterate through instructions
+        # Instruction the task is rolled back to if it's preempted: the
+        # first request granted since it last held nothing
+        self.rollbackPoint = 0
+        self.numPreemptions = 0 # Times it was rolled back
+        # Cycles left before the current instruction wants to "be run"
+        self.remainingDelay = \
+            instructions.getDelay(0) if len(instructions) else 0
+        # Instruction object for the current pointer (built on demand)
+        self.loadedInstruction = None
 
         # State variables
         self.waiting = False
+        # First cycle of the current wait that isn't in stats['waiting'] yet
+        # (the simulation charges waiting time when the wait ends)
+        self.waitingSince = None
         self.finished = False
         self.aborted = False
+        # Counts of active and waiting tasks (shared by all tasks)
+        self.states = states
 
         # Maps resource ID to count of units (relevant to Banker's algorithm)
         self.claims = {}
@@ -66,7 +84,11 @@ class Task:
             self.currInstruction >= len(self.instructions) ):
             return None
 
-        return self.instructions[self.currInstruction]
+        if self.loadedInstruction is None:
+            self.loadedInstruction = \
+                self.instructions.getInstruction(self.currInstruction)
+
+        return self.loadedInstruction
 
 
     def isActive(self):
@@ -94,32 +116,41 @@ class Task:
         return self.aborted
 
 
-    def wait(self):
+    def wait(self, cycle=0):
         '''
-        Marks task as 'waiting'
+        Marks task as 'waiting' (from the given cycle on, which is charged)
         '''
-        self.waiting = True
+        if not self.waiting:
+            self.waiting = True
+            self.waitingSince = cycle
+            if self.isActive():
+                self.states.startWaiting(self)
 
-    def stopWaiting(self):
+    def stopWaiting(self, cycle=None):
         '''
-        Tells task to stop waiting
+        Tells task to stop waiting, and charges it the waiting time up to the
+        given cycle (excluded) if there's one
         '''
-        self.waiting = False
+        if self.waiting:
+            if cycle is not None:
+                self.chargeWaitingTime(cycle)
+            self.waiting = False
+            if self.isActive():
+                self.states.stopWaiting(self)
 
     def abort(self):
         '''
         Aborts the task and releases its resources
         '''
+        wasActive = self.isActive()
+
         self.releaseAllResources()
         self.stopWaiting()
         self.aborted = True
 
+        if wasActive:
+            self.states.deactivate(self)
 
-    def addInstruction(self, instruction):
-        '''
-        Adds an instruction to the task's list
-        '''
-        self.instructions.append( instruction )
 
     def incInstruction(self):
         '''
@@ -127,14 +158,54 @@ class Task:
         '''
         if self.currInstruction < len(self.instructions) - 1:
             self.currInstruction += 1
-        else:
+            self.remainingDelay = \
+                self.instructions.getDelay(self.currInstruction)
+            self.loadedInstruction = None
+        elif not self.finished:
             self.finished = True
+            if not self.aborted:
+                self.states.deactivate(self)
 
-    def incWaitingTime(self):
+    def rollBack(self):
+        '''
+        Moves the 'pointer' back to the rollback point, so that the
+        instructions since then are carried out again (the units they were
+        granted have to be taken back from the task first)
+        '''
+        self.currInstruction = self.rollbackPoint
+        self.remainingDelay = self.instructions.getDelay(self.currInstruction)
+        self.loadedInstruction = None
+        self.numPreemptions += 1
+
+    def countDownDelay(self, time=1):
+        '''
+        Decrements the remaining delay of the current instruction
+        '''
+        self.remainingDelay -= time
+
+    def incWaitingTime(self, time=1):
         '''
         Increments the time the task has been waiting
         '''
-        self.stats['waiting'] += 1
+        self.stats['waiting'] += time
+
+    def chargeWaitingTime(self, cycle):
+        '''
+        Adds the cycles spent waiting up to the given one (excluded) to the
+        stats, if the task is waiting
+        '''
+        if self.waiting:
+            self.incWaitingTime(cycle - self.waitingSince)
+            self.waitingSince = cycle
+
+    def getWaitingTime(self, cycle):
+        '''
+        Gets the time the task has been waiting, counting the cycles of the
+        current wait up to the given one (excluded)
+        '''
+        if self.waiting:
+            return self.stats['waiting'] + cycle - self.waitingSince
+        return self.stats['waiting']
 
     def clockEndTime(self, time):
         '''
@@ -163,7 +234,8 @@ class Task:
             else:
                 return self.claims[resourceID]
         else:
-            maxLeft = {rID:numUnits for rID, numUnits in self.claims.iteritems()}
+            maxLeft = {rID:numUnits
+                for rID, numUnits in self.claims.iteritems()}
             for rID in maxLeft.keys():
                 if rID in self.heldResources.keys():
                     maxLeft[rID] -= self.heldResources[rID]
@@ -175,6 +247,9 @@ class Task:
         Does not check if the resource actually has the units
         (that's the manager's job --this is just book-keeping)
         '''
+        if not any(self.heldResources.values()):
+            self.rollbackPoint = self.currInstruction
+
         if( resourceID in self.heldResources.keys() ):
             # Already have at least one unit of this resource
             self.heldResources[resourceID] += numUnits
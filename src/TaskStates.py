@@ -0,0 +1,40 @@
+class TaskStates:
+    '''
+    Keeps count of the active tasks and of those among them that are waiting,
+    so that a simulation doesn't need to scan all of its tasks to find out
+    about them. Note that tasks report their own state changes (see Task).
+    '''
+
+    def __init__(self):
+        self.numActive = 0 # Tasks that are neither finished nor aborted
+        self.numWaiting = 0 # Active tasks that are waiting
+
+
+    def addTask(self, task):
+        '''
+        Counts a new (active) task
+        '''
+        self.numActive += 1
+        if task.isWaiting():
+            self.startWaiting(task)
+
+    def startWaiting(self, task):
+        '''
+        Counts an active task that was told to wait
+        '''
+        self.numWaiting += 1
+
+    def stopWaiting(self, task):
+        '''
+        Counts an active task that stopped waiting
+        '''
+        self.numWaiting -= 1
+
+    def deactivate(self, task):
+        '''
+        Counts a task that finished or was aborted
+        '''
+        self.numActive -= 1
+        if task.isWaiting():
+            self.numWaiting -= 1
+
@@ -0,0 +1,122 @@
+import os
+import hashlib
+import tempfile
+
+import numpy
+
+from Program import Program
+from InstructionTable import InstructionTable
+
+
+# Binary trace layout (all little-endian):
+#   header                      HEADER
+#   units of each resource      int64[numResources]
+#   start of each task's run    int64[numTasks + 1]
+#   instructions                RECORD[numInstructions] (grouped by task, in
+#                               order; task i's run is [start[i-1], start[i]))
+
+# Identifies (and versions) the binary trace format
+MAGIC = "RMTRACE1"
+
+# Header: magic, number of tasks, number of resources, number of instructions
+HEADER = numpy.dtype([('magic', 'S8'), ('numTasks', '<i8'),
+    ('numResources', '<i8'), ('numInstructions', '<i8')])
+
+# Fixed-width instruction record
+RECORD = numpy.dtype([('command', 'u1'), ('delay', '<i4'),
+    ('resourceType', '<i4'), ('numUnits', '<i4')])
+
+
+def getTracePath(cacheDir, filePath):
+    '''
+    Gets the path of the cached trace of an input file, which is keyed on the
+    file's absolute path and modification time
+    '''
+    mtime = repr(os.path.getmtime(filePath))
+    key = hashlib.sha1(os.path.abspath(filePath) + "\0" + mtime).hexdigest()
+
+    return os.path.join(cacheDir, key + ".trace")
+
+
+def writeTrace(program, tracePath):
+    '''
+    Writes a compiled program to a binary trace. The file is written under a
+    temporary name and renamed into place, so concurrent writers and readers
+    never see a partial trace.
+    '''
+    starts = numpy.zeros(program.numTasks + 1, dtype='<i8')
+    for taskID in range(1, program.numTasks + 1):
+        starts[taskID] = starts[taskID - 1] + len(program.tables[taskID])
+
+    header = numpy.zeros(1, dtype=HEADER)
+    header['magic'] = MAGIC
+    header['numTasks'] = program.numTasks
+    header['numResources'] = program.numResources
+    header['numInstructions'] = starts[-1]
+
+    records = numpy.empty(starts[-1], dtype=RECORD)
+    for taskID, table in program.tables.iteritems():
+        run = records[starts[taskID - 1]:starts[taskID]]
+        run['command'] = table.commands
+        run['delay'] = table.delays
+        run['resourceType'] = table.resourceTypes
+        run['numUnits'] = table.numUnits
+
+    fd, tmpPath = tempfile.mkstemp(dir=os.path.dirname(tracePath))
+    with os.fdopen(fd, 'wb') as file:
+        header.tofile(file)
+        numpy.array(program.units, dtype='<i8').tofile(file)
+        starts.tofile(file)
+        records.tofile(file)
+    os.rename(tmpPath, tracePath)
+
+
+def readTrace(tracePath):
+    '''
+    Memory-maps a binary trace and returns it as a Program whose instruction
+    tables are views onto the mapped records (which processes reading the
+    same trace share)
+    '''
+    header = numpy.memmap(tracePath, dtype=HEADER, mode='r', shape=1)[0]
+    if header['magic'] != MAGIC:
+        raise IOError("Not a binary trace: '" + tracePath + "'")
+
+    numTasks = int(header['numTasks'])
+    numResources = int(header['numResources'])
+    numInstructions = int(header['numInstructions'])
+
+    offset = HEADER.itemsize
+    units = numpy.memmap(tracePath, dtype='<i8', mode='r', offset=offset,
+        shape=numResources)
+    offset += units.nbytes
+    starts = numpy.memmap(tracePath, dtype='<i8', mode='r', offset=offset,
+        shape=numTasks + 1)
+    offset += starts.nbytes
+    records = numpy.memmap(tracePath, dtype=RECORD, mode='r', offset=offset,
+        shape=numInstructions)
+
+    tables = {}
+    for taskID in range(1, numTasks + 1):
+        run = records[starts[taskID - 1]:starts[taskID]]
+        tables[taskID] = InstructionTable(taskID, (run['command'],
+            run['delay'], run['resourceType'], run['numUnits']))
+
+    outline = [numTasks, numResources] + [int(u) for u in units]
+    return Program(outline, (), tables)
+
+
+def loadProgram(filePath, cacheDir, compileFile):
+    '''
+    Returns the program of an input file from the cache, compiling it with
+    compileFile(filePath) and caching it first if it isn't there (or the file
+    has changed since)
+    '''
+    tracePath = getTracePath(cacheDir, filePath)
+
+    if not os.path.isfile(tracePath):
+        if not os.path.isdir(cacheDir):
+            try: os.makedirs(cacheDir)
+            except OSError: pass # Created by another process in the meantime
+        writeTrace(compileFile(filePath), tracePath)
+
+    return readTrace(tracePath)
@@ -0,0 +1,265 @@
+import json
+
+
+class TaskTracer:
+    '''
+    Records what happens to each task of a simulation (its claims, requests,
+    grants, waits, releases, preemptions, aborts and termination, along with
+    the Banker's safety checks and the deadlocks that were resolved) as
+    events of the Chrome trace-event format, which trace viewers
+    (chrome://tracing, Perfetto) show as a timeline per task. Like the
+    Profiler, it wraps methods of the one simulation it instruments, so
+    simulations that aren't traced run the very same code as before.
+
+    Events are buffered and written out to the file in batches as the
+    simulation runs, so that the memory taken doesn't grow with the length
+    of the run. A cycle is shown as one millisecond.
+    '''
+
+    # Microseconds (the unit of the format's timestamps) per cycle
+    CYCLE_LENGTH = 1000
+    # Events held before they're written out
+    BUFFER_SIZE = 4096
+    # Thread of the events that don't belong to a task
+    MANAGER_THREAD = 0
+
+    def __init__(self, file, bufferSize=BUFFER_SIZE):
+        self.file = file
+        self.bufferSize = bufferSize
+        self.buffer = [] # Events that weren't written out yet
+        self.numEvents = 0 # Events written out so far
+        self.simulation = None
+        self.pid = 1 # Process of the events (the simulation)
+
+        # Maps the IDs of waiting tasks to (the cycle they started waiting,
+        # the ID of the resource they wait for)
+        self.waits = {}
+        # IDs of the tasks aborted by the deadlock being resolved (if any)
+        self.victims = None
+
+        self.file.write('{"traceEvents":[\n')
+
+
+    def instrument(self, simulation, name=None):
+        '''
+        Wraps the methods of a simulation whose effects are traced, and names
+        its timelines (after the manager, unless a name is given)
+        '''
+        self.simulation = simulation
+
+        self.addMetadata("process_name", None,
+            {'name':name or simulation.policy.NAME})
+        self.addMetadata("thread_name", self.MANAGER_THREAD,
+            {'name':"Manager"})
+        for taskID in sorted(simulation.tasks.keys()):
+            self.addMetadata("thread_name", taskID,
+                {'name':"Task " + str(taskID)})
+            self.addMetadata("thread_sort_index", taskID,
+                {'sort_index':taskID})
+
+        # Tasks that already wait (e.g. in a simulation restored from a
+        # checkpoint)
+        for task in simulation.waitingTasks.values():
+            if task.isActive() and task.id in simulation.waitingOn:
+                self.waits[task.id] = (task.waitingSince,
+                    simulation.waitingOn[task.id][1])
+
+        for method in ("execute", "standardRequest", "isSafe", "waitTask",
+                       "leaveWaiting", "retireTask", "resolveDeadlock",
+                       "preemptTask"):
+            original = getattr(simulation, method)
+            traced = getattr(self, "trace" + method[0].upper() + method[1:])
+            setattr(simulation, method, self.wrap(original, traced))
+
+    def wrap(self, original, traced):
+        '''
+        Returns a function that calls the traced version of a method with
+        the original one as its first argument
+        '''
+        def wrapper(*args):
+            return traced(original, *args)
+
+        return wrapper
+
+
+    def traceExecute(self, execute, task, instruction):
+        '''
+        Traces claims, releases and the first attempt at each request (the
+        retries of a waiting task fall within its wait)
+        '''
+        if not task.remainingDelay:
+            args = {'resource':instruction.resourceType,
+                'units':instruction.numUnits}
+            if instruction.command == "initiate":
+                self.addInstant("claim", task.id, args)
+            elif instruction.command == "release":
+                self.addInstant("release", task.id, args)
+            elif instruction.command == "request" and \
+                 task.id not in self.waits:
+                self.addInstant("request", task.id, args)
+
+        return execute(task, instruction)
+
+    def traceStandardRequest(self, standardRequest, task, instruction):
+        '''
+        Traces the grant of a request
+        '''
+        delayed = task.remainingDelay
+        standardRequest(task, instruction)
+
+        if not delayed and not task.isWaiting() and task.isActive():
+            self.addInstant("grant", task.id, {
+                'resource':instruction.resourceType,
+                'units':instruction.numUnits})
+
+    def traceIsSafe(self, isSafe, task, instruction):
+        '''
+        Traces the Banker's safety checks (those that the safety engine
+        answered, as opposed to requests for more units than available)
+        '''
+        safe = isSafe(task, instruction)
+
+        resource = self.simulation.resources[instruction.resourceType]
+        if task.isActive() and \
+           instruction.numUnits <= resource.numAvailableUnits:
+            self.addInstant("safe" if safe else "unsafe", task.id, {
+                'resource':instruction.resourceType,
+                'units':instruction.numUnits})
+
+        return safe
+
+    def traceWaitTask(self, waitTask, task, instruction):
+        '''
+        Starts the wait of a task that's told to wait
+        '''
+        if task.isActive() and task.id not in self.waits:
+            self.waits[task.id] = (self.simulation.sysClock,
+                instruction.resourceType)
+
+        waitTask(task, instruction)
+
+    def traceLeaveWaiting(self, leaveWaiting, task):
+        '''
+        Ends the wait of a task that stops waiting (or is aborted)
+        '''
+        if task.id in self.waits:
+            self.addWait(task.id, self.simulation.getWaitClock())
+
+        leaveWaiting(task)
+
+    def traceRetireTask(self, retireTask, task):
+        '''
+        Traces the end of a task: the span of its whole run, along with its
+        abort or termination
+        '''
+        retireTask(task)
+
+        if task.isAborted():
+            end = self.simulation.sysClock
+            args = {'aborted':True}
+            self.addInstant("abort", task.id, {})
+            if self.victims is not None:
+                self.victims.append(task.id)
+        else:
+            end = task.stats['running']
+            args = {'aborted':False, 'waiting':task.stats['waiting']}
+            self.addInstant("terminate", task.id, {})
+
+        self.addEvent({'name':"Task " + str(task.id), 'cat':"task",
+            'ph':"X", 'ts':0, 'dur':end * self.CYCLE_LENGTH,
+            'tid':task.id, 'args':args})
+
+    def traceResolveDeadlock(self, resolveDeadlock):
+        '''
+        Traces the deadlocks that were resolved, with the tasks aborted for
+        them
+        '''
+        self.victims = []
+        try:
+            resolveDeadlock()
+        finally:
+            if self.victims:
+                self.addInstant("deadlock", self.MANAGER_THREAD,
+                    {'victims':self.victims})
+            self.victims = None
+
+
+    def tracePreemptTask(self, preemptTask, task):
+        '''
+        Traces the preemption of a task, with the units taken back from it
+        and the instruction it's rolled back to
+        '''
+        held = {str(rID):numUnits
+            for rID, numUnits in task.heldResources.iteritems() if numUnits}
+        preemptTask(task)
+
+        self.addInstant("preempt", task.id, {'units':held,
+            'rollbackPoint':task.currInstruction})
+
+
+    def addWait(self, taskID, end):
+        '''
+        Adds the span of a task's wait, up to the given cycle
+        '''
+        start, rID = self.waits.pop(taskID)
+        if end > start:
+            self.addEvent({'name':"wait for resource " + str(rID),
+                'cat':"wait", 'ph':"X", 'ts':start * self.CYCLE_LENGTH,
+                'dur':(end - start) * self.CYCLE_LENGTH, 'tid':taskID,
+                'args':{'resource':rID}})
+
+    def addInstant(self, name, tid, args):
+        '''
+        Adds an event of the current cycle to a task's timeline (or the
+        manager's)
+        '''
+        self.addEvent({'name':name, 'cat':name, 'ph':"i", 's':"t",
+            'ts':self.simulation.sysClock * self.CYCLE_LENGTH, 'tid':tid,
+            'args':args})
+
+    def addMetadata(self, name, tid, args):
+        '''
+        Adds an event that names or orders the timelines
+        '''
+        event = {'name':name, 'ph':"M", 'args':args}
+        if tid is not None:
+            event['tid'] = tid
+        self.addEvent(event)
+
+    def addEvent(self, event):
+        '''
+        Buffers an event, and writes out the buffer once it's full
+        '''
+        event['pid'] = self.pid
+        self.buffer.append(event)
+        if len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+
+    def flush(self):
+        '''
+        Writes out the buffered events
+        '''
+        if not self.buffer:
+            return
+
+        if self.numEvents:
+            self.file.write(",\n")
+        self.file.write(",\n".join(json.dumps(event, sort_keys=True,
+            separators=(",", ":")) for event in self.buffer))
+
+        self.numEvents += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        '''
+        Ends the waits still going on (if the simulation was stopped before
+        it finished), writes out the remaining events and completes the file
+        (which is left open)
+        '''
+        if self.simulation is not None:
+            for taskID in sorted(self.waits.keys()):
+                self.addWait(taskID, self.simulation.getWaitClock())
+
+        self.flush()
+        self.file.write('\n],"displayTimeUnit":"ms"}\n')
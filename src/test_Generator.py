@@ -0,0 +1,33 @@
+#!/usr/bin/python2.7
+
+import random
+import unittest
+
+from Generator import DelayDistribution, drawDelay
+
+
+class DrawDelayTest(unittest.TestCase):
+    '''
+    Checks that the delays drawn from each distribution average their mean
+    '''
+    NUM_DRAWS = 200000
+
+    def empiricalMean(self, mean, distribution):
+        rand = random.Random(7)
+        return float(sum(drawDelay(rand, mean, distribution)
+            for _ in range(self.NUM_DRAWS))) / self.NUM_DRAWS
+
+    def test_means(self):
+        for distribution in DelayDistribution.ALL:
+            for mean in (1, 2, 5):
+                self.assertAlmostEqual(self.empiricalMean(mean, distribution),
+                    mean, delta=0.02 * mean + 0.02,
+                    msg="%s with mean %d" % (distribution, mean))
+
+    def test_zeroMean(self):
+        for distribution in DelayDistribution.ALL:
+            self.assertEqual(self.empiricalMean(0, distribution), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python2.7
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from Manager import loadInputFile, simulateAlgorithm
+from Partition import simulatePartitioned, sameStats
+
+
+# Task 1 is aborted for exceeding its claim in cycle 2, which leaves the
+# whole state unsafe until the next cycle (task 2 may still need all of
+# resource 1), while task 3, which only deals with resource 2, requests a
+# unit in the same cycle: it has to wait in the whole input
+OVER_CLAIM_ABORT = """3 2 4 2
+initiate  1 0 1 2
+request   1 0 1 2
+request   1 0 1 1
+release   1 0 1 3
+terminate 1 0 0 0
+
+initiate  2 0 1 4
+request   2 5 1 1
+release   2 0 1 1
+terminate 2 0 0 0
+
+initiate  3 0 2 1
+request   3 1 2 1
+release   3 0 2 1
+terminate 3 0 0 0
+"""
+
+
+class SimulatePartitionedTest(unittest.TestCase):
+    '''
+    Checks that simulating the groups of tasks on their own yields the same
+    stats as simulating the whole input
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameAsWhole(self, text, managers):
+        filePath = os.path.join(self.directory, "input.txt")
+        with open(filePath, 'w') as file:
+            file.write(text)
+
+        _, globalStats = simulatePartitioned(filePath, managers,
+            numProcesses=2)
+        program = loadInputFile(filePath)
+        for manager, stats in zip(managers, globalStats):
+            self.assertTrue(sameStats(stats,
+                simulateAlgorithm(program, manager)), manager)
+        return globalStats
+
+    def test_overClaimAbort(self):
+        stats, = self.assertSameAsWhole(OVER_CLAIM_ABORT, ["banker"])
+        self.assertEqual((stats[3]['taken'], stats[3]['waiting']), (5, 1))
+        self.assertFalse(stats['meta']['partitioned'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,5 @@
 #!/bin/bash
 clear
 
-TestFile() {
-  python2.7 src/Manager.py $1
-}
-
-for FILE in $(ls inputs)
-do
-  echo "CURRENTLY TESTING $FILE"
-  TestFile "inputs/$FILE"
-  echo "------------------------------"
-done
+# Simulates every input in parallel and prints the results in order
+python2.7 src/Manager.py $(ls -d inputs/*)